@@ -8,10 +8,15 @@ Para iniciar o worker:
 
 import os
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
 from dotenv import load_dotenv
 load_dotenv()
 
 from celery import Celery
+from celery.signals import worker_process_shutdown, worker_shutdown
 from neo4j import GraphDatabase
 
 from langchain_text_splitters import TokenTextSplitter
@@ -19,7 +24,6 @@ from langchain_core.documents import Document as LCDocument
 # Removido PyMuPDFLoader - agora usa FileProcessor
 
 from llama_index.core import Settings
-from llama_index.embeddings.openai import OpenAIEmbedding
 
 from llm_providers import LLMProvider
 from neo4j_store import CustomNeo4jVectorStore
@@ -58,17 +62,183 @@ celery_app.conf.update(
 # Embeddings serão configurados dinamicamente baseado no modelo escolhido
 
 
-def get_neo4j_driver():
-    """Cria conexão com Neo4j"""
-    return GraphDatabase.driver(
-        os.getenv("NEO4J_URI"),
-        auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
+@dataclass(frozen=True, slots=True)
+class WorkerConfig:
+    """Configuração do worker lida do ambiente"""
+    neo4j_uri: Optional[str]
+    neo4j_user: Optional[str]
+    neo4j_password: Optional[str]
+    neo4j_database: str
+    default_model: str
+    api_internal_url: str
+    token_chunk_size: int
+    chunk_overlap: int
+    max_token_chunk_size: int
+    force_openai_embeddings: bool
+    local_embedding_dimension: int
+    embed_batch_size: int
+    summary_max_tokens: int
+
+
+@lru_cache(maxsize=1)
+def get_config() -> WorkerConfig:
+    """Lê as variáveis de ambiente uma única vez por processo do worker"""
+    return WorkerConfig(
+        neo4j_uri=os.getenv("NEO4J_URI"),
+        neo4j_user=os.getenv("NEO4J_USER"),
+        neo4j_password=os.getenv("NEO4J_PASSWORD"),
+        neo4j_database=os.getenv("NEO4J_DATABASE", "neo4j"),
+        default_model=os.getenv("DEFAULT_MODEL", "deepseek"),
+        api_internal_url=os.getenv("API_INTERNAL_URL", "http://app-ragapi:8000"),
+        token_chunk_size=int(os.getenv("TOKEN_CHUNK_SIZE", 130)),
+        chunk_overlap=int(os.getenv("CHUNK_OVERLAP", 15)),
+        max_token_chunk_size=int(os.getenv("MAX_TOKEN_CHUNK_SIZE", 10000)),
+        force_openai_embeddings=os.getenv("FORCE_OPENAI_EMBEDDINGS", "").lower() == "true",
+        local_embedding_dimension=int(os.getenv("LOCAL_EMBEDDING_DIMENSION", "384")),
+        embed_batch_size=int(os.getenv("EMBED_BATCH_SIZE", "32")),
+        summary_max_tokens=int(os.getenv("SUMMARY_MAX_TOKENS", "2000")),
     )
 
 
+# Labels usados pelo próprio pipeline (entidades com esses tipos são renomeadas)
+RESERVED_LABELS = frozenset({'Document', 'Chunk', 'Session', 'Message'})
+
+
+_DRIVER = None
+
+
+def get_neo4j_driver():
+    """Retorna o driver Neo4j compartilhado pelo processo (pool de conexões)"""
+    global _DRIVER
+    if _DRIVER is None:
+        cfg = get_config()
+        _DRIVER = GraphDatabase.driver(
+            cfg.neo4j_uri,
+            auth=(cfg.neo4j_user, cfg.neo4j_password)
+        )
+    return _DRIVER
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_neo4j_driver(**kwargs):
+    """Fecha o driver compartilhado ao encerrar o worker"""
+    global _DRIVER
+    if _DRIVER is not None:
+        _DRIVER.close()
+        _DRIVER = None
+
+
+_HTTP_SESSION = None
+
+
+def get_http_session():
+    """Sessão HTTP compartilhada (keep-alive) para chamadas à API interna"""
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        # Pool de conexões persistentes + retry com backoff para falhas transitórias da API
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=4,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[500, 502, 503, 504],
+                allowed_methods=["GET"],
+                raise_on_status=False
+            )
+        )
+        _HTTP_SESSION = requests.Session()
+        _HTTP_SESSION.mount("http://", adapter)
+        _HTTP_SESSION.mount("https://", adapter)
+    return _HTTP_SESSION
+
+
+_EMBED_MODEL = None
+
+
+def get_embed_model():
+    """Carrega o modelo de embeddings uma única vez por processo do worker"""
+    global _EMBED_MODEL
+    if _EMBED_MODEL is None:
+        _EMBED_MODEL = LLMProvider.get_embedding_model()
+        _EMBED_MODEL.embed_batch_size = get_config().embed_batch_size
+    return _EMBED_MODEL
+
+
+def build_summary_context(chunks, max_tokens: int) -> str:
+    """Concatena chunks em ordem até atingir max_tokens (contados com tiktoken)"""
+    import tiktoken
+    encoding = tiktoken.get_encoding("cl100k_base")
+    separator = encoding.encode("\n\n")
+    
+    token_ids = []
+    for chunk in chunks:
+        ids = encoding.encode(chunk.page_content)
+        if token_ids:
+            ids = separator + ids
+        remaining = max_tokens - len(token_ids)
+        if len(ids) > remaining:
+            # Primeiro chunk maior que o orçamento: usar apenas o início
+            if not token_ids:
+                token_ids.extend(ids[:remaining])
+            break
+        token_ids.extend(ids)
+    
+    return encoding.decode(token_ids)
+
+
+def generate_summary(driver, database: str, document_id: str, chunks, model: str) -> str:
+    """Gera o resumo executivo do documento e salva em d.summary"""
+    print("📝 Etapa 5: Gerando resumo do documento...")
+    
+    try:
+        # Juntar chunks para contexto até o limite de tokens
+        context_text = build_summary_context(chunks, get_config().summary_max_tokens)
+        
+        # Obter LLM para gerar resumo
+        llm = LLMProvider.get_llm(model)
+        
+        summary_prompt = f"""Analise o seguinte conteúdo de documento e gere um resumo executivo conciso.
+
+O resumo deve:
+1. Ter no máximo 3 parágrafos
+2. Destacar os pontos principais
+3. Ser contextual e informativo
+4. Estar em português
+
+CONTEÚDO:
+{context_text}
+
+RESUMO:"""
+        
+        # Usar invoke() para LangChain chat models
+        from langchain_core.messages import HumanMessage
+        summary_response = llm.invoke([HumanMessage(content=summary_prompt)])
+        document_summary = summary_response.content.strip()
+        
+        # Salvar resumo no documento
+        with driver.session(database=database) as session:
+            session.run("""
+                MATCH (d:Document {id: $document_id})
+                SET d.summary = $summary
+            """, document_id=document_id, summary=document_summary)
+        
+        print(f"   ✅ Resumo gerado ({len(document_summary)} caracteres)")
+    except Exception as e:
+        print(f"   ⚠️ Erro ao gerar resumo: {str(e)}")
+        document_summary = ""
+    
+    return document_summary
+
+
 def update_progress(driver, document_id: str, progress: float, status: str = None, error: str = None):
     """Atualiza progresso do processamento no Neo4j"""
-    database = os.getenv("NEO4J_DATABASE", "neo4j")
+    database = get_config().neo4j_database
     with driver.session(database=database) as session:
         query = """
             MATCH (d:Document {id: $document_id})
@@ -99,12 +269,14 @@ def process_document_task(self, document_id: str, file_path: str, model: str = N
     3. Embeddings (80-95%)
     4. Finalização (95-100%)
     """
+    cfg = get_config()
+    
     # Usar modelo padrão se não especificado
     if not model:
-        model = os.getenv("DEFAULT_MODEL", "deepseek")
+        model = cfg.default_model
     
     driver = get_neo4j_driver()
-    database = os.getenv("NEO4J_DATABASE", "neo4j")
+    database = cfg.neo4j_database
     
     try:
         # Validar modelo
@@ -144,14 +316,14 @@ def process_document_task(self, document_id: str, file_path: str, model: str = N
             print(f"🔄 Tentando baixar da API interna...")
             
             try:
-                import requests
+                session = get_http_session()
                 filename = os.path.basename(file_path)
                 # Tenta adivinhar URL interna ou usa env var
-                api_url = os.getenv("API_INTERNAL_URL", "http://app-ragapi:8000")
+                api_url = cfg.api_internal_url
                 download_url = f"{api_url}/uploads/{filename}"
                 
                 print(f"   ⬇️ Baixando de: {download_url}")
-                response = requests.get(download_url, stream=True, timeout=30)
+                response = session.get(download_url, stream=True, timeout=30)
                 
                 if response.status_code == 200:
                     # Garantir diretório
@@ -166,7 +338,7 @@ def process_document_task(self, document_id: str, file_path: str, model: str = N
                     if "app-ragapi" in api_url:
                         fallback_url = f"http://localhost:8000/uploads/{filename}"
                         print(f"   🔄 Tentando fallback localhost: {fallback_url}")
-                        response = requests.get(fallback_url, stream=True, timeout=10)
+                        response = session.get(fallback_url, stream=True, timeout=10)
                         if response.status_code == 200:
                             with open(file_path, 'wb') as f:
                                 for chunk in response.iter_content(chunk_size=8192):
@@ -182,7 +354,7 @@ def process_document_task(self, document_id: str, file_path: str, model: str = N
             raise ValueError(f"Tipo de arquivo não suportado: {file_path}")
         
         # Extrair texto do arquivo
-        text_content = FileProcessor.extract_text(file_path)
+        text_content = FileProcessor.extract_text_cached(file_path)
         
         # ============================================
         # LIMPEZA: Remover dados antigos (reprocessamento)
@@ -227,10 +399,9 @@ def process_document_task(self, document_id: str, file_path: str, model: str = N
         update_progress(driver, document_id, 10)
         
         # Configuração de chunking
-        token_chunk_size = int(os.getenv('TOKEN_CHUNK_SIZE', 130))
-        chunk_overlap = int(os.getenv('CHUNK_OVERLAP', 15))
-        MAX_TOKEN_CHUNK_SIZE = int(os.getenv('MAX_TOKEN_CHUNK_SIZE', 10000))
-        chunk_to_be_created = int(MAX_TOKEN_CHUNK_SIZE / token_chunk_size)
+        token_chunk_size = cfg.token_chunk_size
+        chunk_overlap = cfg.chunk_overlap
+        chunk_to_be_created = int(cfg.max_token_chunk_size / token_chunk_size)
         
         text_splitter = TokenTextSplitter(
             chunk_size=token_chunk_size,
@@ -341,8 +512,9 @@ def process_document_task(self, document_id: str, file_path: str, model: str = N
                     from datetime import datetime, timedelta, timezone
                     try:
                         # batch_completed_at vem como string do Neo4j
+                        # (Python 3.11+ aceita o sufixo 'Z' em fromisoformat)
                         if isinstance(batch_completed_at, str):
-                            completed_time = datetime.fromisoformat(batch_completed_at.replace('Z', '+00:00'))
+                            completed_time = datetime.fromisoformat(batch_completed_at)
                         else:
                             completed_time = batch_completed_at.to_native()
                         
@@ -483,7 +655,6 @@ def process_document_task(self, document_id: str, file_path: str, model: str = N
                 error_msg += f" Erro: {first_error[:200]}"
             print(f"   ❌ {error_msg}")
             update_progress(driver, document_id, 0, "Failed", error_msg)
-            driver.close()
             return {
                 "document_id": document_id,
                 "status": "Failed",
@@ -508,9 +679,6 @@ def process_document_task(self, document_id: str, file_path: str, model: str = N
             record = result.single()
             filename = record["fileName"] if record else document_id
             
-            # Labels reservados
-            RESERVED_LABELS = {'Document', 'Chunk', 'Session', 'Message'}
-            
             # Salvar chunks
             chunk_id_list = []
             for i, chunk in enumerate(chunks):
@@ -640,89 +808,56 @@ def process_document_task(self, document_id: str, file_path: str, model: str = N
         
         # ============================================
         # ETAPA 4: Embeddings (95-100%)
+        # ETAPA 5: Resumo (em paralelo com os embeddings)
         # ============================================
-        print("🔧 Etapa 4: Gerando embeddings...")
-        
-        # Usar embedding model (local por padrão, OpenAI se FORCE_OPENAI_EMBEDDINGS=true)
-        from llama_index.core.schema import TextNode
-        embed_model = LLMProvider.get_embedding_model(model)
-        
-        # Determinar dimensão do embedding baseado no modelo
-        # OpenAI: 1536, all-MiniLM-L6-v2: 384, all-mpnet-base-v2: 768
-        force_openai = os.getenv("FORCE_OPENAI_EMBEDDINGS", "").lower() == "true"
-        if force_openai:
-            embedding_dimension = 1536
-        else:
-            # Modelos locais - dimensão configurável
-            embedding_dimension = int(os.getenv("LOCAL_EMBEDDING_DIMENSION", "384"))
-        
-        vector_store = CustomNeo4jVectorStore(
-            username=os.getenv("NEO4J_USER"),
-            password=os.getenv("NEO4J_PASSWORD"),
-            url=os.getenv("NEO4J_URI"),
-            embedding_dimension=embedding_dimension,
-            database=database
-        )
-        
-        llama_nodes = []
-        for chunk in chunks:
-            node = TextNode(text=chunk.page_content, metadata=chunk.metadata)
-            node.embedding = embed_model.get_text_embedding(node.get_content())
-            llama_nodes.append(node)
-        
-        # Log da dimensão real do embedding gerado
-        if llama_nodes and llama_nodes[0].embedding:
-            actual_dim = len(llama_nodes[0].embedding)
-            print(f"   📊 Dimensão do embedding: {actual_dim} (esperado: {embedding_dimension})")
-            if actual_dim != embedding_dimension:
-                print(f"   ⚠️ ATENÇÃO: Dimensão não confere! Verifique LOCAL_EMBEDDING_DIMENSION no .env")
-        
-        vector_store.add(llama_nodes)
-        
-        print("   ✅ Embeddings salvos")
-        
-        # ============================================
-        # ETAPA 5: Gerar Resumo (97-99%)
-        # ============================================
-        print("📝 Etapa 5: Gerando resumo do documento...")
-        update_progress(driver, document_id, 97)
-        
-        try:
-            # Juntar primeiros chunks para contexto (limite de tokens)
-            context_text = "\n\n".join([c.page_content for c in chunks[:5]])[:8000]
+        # O resumo depende apenas do texto dos chunks: a chamada ao LLM roda
+        # em outra thread enquanto os embeddings são gerados e salvos
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            summary_future = executor.submit(generate_summary, driver, database, document_id, chunks, model)
             
-            # Obter LLM para gerar resumo
-            llm = LLMProvider.get_llm(model)
+            print("🔧 Etapa 4: Gerando embeddings...")
             
-            summary_prompt = f"""Analise o seguinte conteúdo de documento e gere um resumo executivo conciso.
-
-O resumo deve:
-1. Ter no máximo 3 parágrafos
-2. Destacar os pontos principais
-3. Ser contextual e informativo
-4. Estar em português
-
-CONTEÚDO:
-{context_text}
-
-RESUMO:"""
+            # Usar embedding model (local por padrão, OpenAI se FORCE_OPENAI_EMBEDDINGS=true)
+            from llama_index.core.schema import TextNode
+            embed_model = get_embed_model()
             
-            # Usar invoke() para LangChain chat models
-            from langchain_core.messages import HumanMessage
-            summary_response = llm.invoke([HumanMessage(content=summary_prompt)])
-            document_summary = summary_response.content.strip()
+            # Determinar dimensão do embedding baseado no modelo
+            # OpenAI: 1536, all-MiniLM-L6-v2: 384, all-mpnet-base-v2: 768
+            if cfg.force_openai_embeddings:
+                embedding_dimension = 1536
+            else:
+                # Modelos locais - dimensão configurável
+                embedding_dimension = cfg.local_embedding_dimension
             
-            # Salvar resumo no documento
-            with driver.session(database=database) as session:
-                session.run("""
-                    MATCH (d:Document {id: $document_id})
-                    SET d.summary = $summary
-                """, document_id=document_id, summary=document_summary)
+            vector_store = CustomNeo4jVectorStore(
+                username=cfg.neo4j_user,
+                password=cfg.neo4j_password,
+                url=cfg.neo4j_uri,
+                embedding_dimension=embedding_dimension,
+                database=database,
+                driver=driver
+            )
+            
+            # Embeddings em lote: uma chamada ao modelo por EMBED_BATCH_SIZE chunks
+            llama_nodes = [TextNode(text=chunk.page_content, metadata=chunk.metadata) for chunk in chunks]
+            embeddings = embed_model.get_text_embedding_batch([node.get_content() for node in llama_nodes])
+            for node, embedding in zip(llama_nodes, embeddings):
+                node.embedding = embedding
+            
+            # Log da dimensão real do embedding gerado
+            if llama_nodes and llama_nodes[0].embedding:
+                actual_dim = len(llama_nodes[0].embedding)
+                print(f"   📊 Dimensão do embedding: {actual_dim} (esperado: {embedding_dimension})")
+                if actual_dim != embedding_dimension:
+                    print(f"   ⚠️ ATENÇÃO: Dimensão não confere! Verifique LOCAL_EMBEDDING_DIMENSION no .env")
+            
+            vector_store.add(llama_nodes)
+            
+            print("   ✅ Embeddings salvos")
+            update_progress(driver, document_id, 97)
             
-            print(f"   ✅ Resumo gerado ({len(document_summary)} caracteres)")
-        except Exception as e:
-            print(f"   ⚠️ Erro ao gerar resumo: {str(e)}")
-            document_summary = ""
+            # Aguarda o resumo (gravado no Document pela própria tarefa) antes de concluir
+            summary_future.result()
         
         # ============================================
         # Finalização
@@ -742,5 +877,3 @@ RESUMO:"""
         print(f"❌ Erro no processamento: {str(e)}")
         update_progress(driver, document_id, 0, "Failed", str(e))
         raise
-    finally:
-        driver.close()
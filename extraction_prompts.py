@@ -3,10 +3,10 @@ Exemplos de prompts customizados para extração de grafo
 Use conforme o tipo de documento que está processando
 """
 
-# Prompt genérico (padrão) - máximo de entidades e relacionamentos
-GENERIC_PROMPT = """You are an expert at extracting information and building knowledge graphs.
-Extract ALL entities and relationships from the text, being as comprehensive as possible.
-Return a valid JSON with this exact structure:
+import sys
+
+# Blocos de schema JSON compartilhados pelos prompts (texto idêntico ao original)
+JSON_SCHEMA_BLOCK = """Return a valid JSON with this exact structure:
 {
   "nodes": [
     {"id": "entity_id", "type": "EntityType", "properties": {"description": "brief description"}}
@@ -14,7 +14,22 @@ Return a valid JSON with this exact structure:
   "relationships": [
     {"source": "entity_id_1", "target": "entity_id_2", "type": "RELATIONSHIP_TYPE", "properties": {"description": "brief description"}}
   ]
-}
+}"""
+
+COMPACT_SCHEMA_BLOCK = """Return ONLY this JSON:
+{
+  "nodes": [
+    {"id": "entity_id", "type": "EntityType", "properties": {"description": "what is this"}}
+  ],
+  "relationships": [
+    {"source": "id1", "target": "id2", "type": "RELATIONSHIP", "properties": {"description": "how they relate"}}
+  ]
+}"""
+
+# Prompt genérico (padrão) - máximo de entidades e relacionamentos
+GENERIC_PROMPT = """You are an expert at extracting information and building knowledge graphs.
+Extract ALL entities and relationships from the text, being as comprehensive as possible.
+""" + JSON_SCHEMA_BLOCK + """
 
 IMPORTANT:
 - Extract EVERY entity mentioned, including: people, organizations, locations, concepts, products, events, dates, etc.
@@ -28,15 +43,7 @@ IMPORTANT:
 # Prompt para documentos jurídicos
 LEGAL_PROMPT = """You are an expert at extracting legal information and building knowledge graphs.
 Extract entities and relationships from legal documents.
-Return a valid JSON with this exact structure:
-{
-  "nodes": [
-    {"id": "entity_id", "type": "EntityType", "properties": {"description": "brief description"}}
-  ],
-  "relationships": [
-    {"source": "entity_id_1", "target": "entity_id_2", "type": "RELATIONSHIP_TYPE", "properties": {"description": "brief description"}}
-  ]
-}
+""" + JSON_SCHEMA_BLOCK + """
 
 Entity types to extract:
 - Person: Names of individuals (plaintiffs, defendants, witnesses, judges)
@@ -60,15 +67,7 @@ Return ONLY valid JSON, no markdown."""
 # Prompt para documentos médicos
 MEDICAL_PROMPT = """You are an expert at extracting medical information and building knowledge graphs.
 Extract entities and relationships from medical documents.
-Return a valid JSON with this exact structure:
-{
-  "nodes": [
-    {"id": "entity_id", "type": "EntityType", "properties": {"description": "brief description"}}
-  ],
-  "relationships": [
-    {"source": "entity_id_1", "target": "entity_id_2", "type": "RELATIONSHIP_TYPE", "properties": {"description": "brief description"}}
-  ]
-}
+""" + JSON_SCHEMA_BLOCK + """
 
 Entity types to extract:
 - Patient: Patient names/identifiers
@@ -93,15 +92,7 @@ Return ONLY valid JSON, no markdown."""
 # Prompt para documentos técnicos
 TECHNICAL_PROMPT = """You are an expert at extracting technical information and building knowledge graphs.
 Extract entities and relationships from technical documents.
-Return a valid JSON with this exact structure:
-{
-  "nodes": [
-    {"id": "entity_id", "type": "EntityType", "properties": {"description": "brief description"}}
-  ],
-  "relationships": [
-    {"source": "entity_id_1", "target": "entity_id_2", "type": "RELATIONSHIP_TYPE", "properties": {"description": "brief description"}}
-  ]
-}
+""" + JSON_SCHEMA_BLOCK + """
 
 Entity types to extract:
 - Technology: Programming languages, frameworks, tools
@@ -126,15 +117,7 @@ Return ONLY valid JSON, no markdown."""
 # Prompt para documentos financeiros
 FINANCIAL_PROMPT = """You are an expert at extracting financial information and building knowledge graphs.
 Extract entities and relationships from financial documents.
-Return a valid JSON with this exact structure:
-{
-  "nodes": [
-    {"id": "entity_id", "type": "EntityType", "properties": {"description": "brief description"}}
-  ],
-  "relationships": [
-    {"source": "entity_id_1", "target": "entity_id_2", "type": "RELATIONSHIP_TYPE", "properties": {"description": "brief description"}}
-  ]
-}
+""" + JSON_SCHEMA_BLOCK + """
 
 Entity types to extract:
 - Company: Companies, corporations
@@ -161,15 +144,7 @@ AESTHETICS_PROMPT = """Extract entities and relationships from this aesthetic/be
 
 Focus on: procedures, treatments, products, ingredients, body parts, conditions, professionals, clinics, results.
 
-Return ONLY this JSON:
-{
-  "nodes": [
-    {"id": "entity_id", "type": "EntityType", "properties": {"description": "what is this"}}
-  ],
-  "relationships": [
-    {"source": "id1", "target": "id2", "type": "RELATIONSHIP", "properties": {"description": "how they relate"}}
-  ]
-}
+""" + COMPACT_SCHEMA_BLOCK + """
 
 Extract ALL entities and relationships. Return ONLY JSON."""
 
@@ -178,15 +153,7 @@ HEALTH_PROMPT = """Extract entities and relationships from this health/wellness
 
 Focus on: conditions, diseases, symptoms, treatments, medications, professionals, facilities, lifestyle factors.
 
-Return ONLY this JSON:
-{
-  "nodes": [
-    {"id": "entity_id", "type": "EntityType", "properties": {"description": "what is this"}}
-  ],
-  "relationships": [
-    {"source": "id1", "target": "id2", "type": "RELATIONSHIP", "properties": {"description": "how they relate"}}
-  ]
-}
+""" + COMPACT_SCHEMA_BLOCK + """
 
 Extract ALL entities and relationships. Return ONLY JSON."""
 
@@ -195,19 +162,11 @@ IT_PROMPT = """Extract entities and relationships from this IT/technology text.
 
 Focus on: languages, frameworks, databases, tools, architectures, services, infrastructure, security, teams, projects.
 
-Return ONLY this JSON:
-{
-  "nodes": [
-    {"id": "entity_id", "type": "EntityType", "properties": {"description": "what is this"}}
-  ],
-  "relationships": [
-    {"source": "id1", "target": "id2", "type": "RELATIONSHIP", "properties": {"description": "how they relate"}}
-  ]
-}
+""" + COMPACT_SCHEMA_BLOCK + """
 
 Extract ALL entities and relationships. Return ONLY JSON."""
 
-# Dicionário de prompts por tipo
+# Dicionário de prompts por tipo (chaves internadas)
 PROMPTS_BY_TYPE = {
     "generic": GENERIC_PROMPT,
     "legal": LEGAL_PROMPT,
@@ -218,7 +177,58 @@ PROMPTS_BY_TYPE = {
     "health": HEALTH_PROMPT,
     "it": IT_PROMPT,
 }
+PROMPTS_BY_TYPE = {sys.intern(k): v for k, v in PROMPTS_BY_TYPE.items()}
+
+DOC_TYPES = frozenset(PROMPTS_BY_TYPE)
 
 def get_prompt(doc_type: str = "generic") -> str:
     """Retorna o prompt para o tipo de documento"""
-    return PROMPTS_BY_TYPE.get(doc_type.lower(), GENERIC_PROMPT)
+    # Tipos já em minúsculas (caso comum) não precisam de lower()
+    if doc_type not in DOC_TYPES:
+        doc_type = doc_type.lower()
+    return PROMPTS_BY_TYPE.get(doc_type, GENERIC_PROMPT)
+
+
+# Schema das respostas do LLM (mesma estrutura pedida nos prompts).
+# Campos ausentes são tolerados pelo worker; o que quebra o pipeline é tipo errado.
+GRAPH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "nodes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"properties": {"type": "object"}},
+            },
+        },
+        "relationships": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"properties": {"type": "object"}},
+            },
+        },
+    },
+}
+
+
+def _validate_graph_fallback(data):
+    """Validação mínima usada quando fastjsonschema não está instalado"""
+    if not isinstance(data, dict):
+        raise ValueError("data must be object")
+    for key in ("nodes", "relationships"):
+        items = data.get(key, [])
+        if not isinstance(items, list):
+            raise ValueError(f"data.{key} must be array")
+        for item in items:
+            if not isinstance(item, dict) or not isinstance(item.get("properties", {}), dict):
+                raise ValueError(f"data.{key} items must be objects")
+    return data
+
+
+try:
+    import fastjsonschema
+    # Compilado uma única vez na importação do módulo
+    validate_graph = fastjsonschema.compile(GRAPH_SCHEMA)
+except ImportError:
+    validate_graph = _validate_graph_fallback
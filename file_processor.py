@@ -3,19 +3,168 @@ Processador de arquivos Office e outros formatos
 Suporta: PDF, DOCX, DOC, XLSX, XLS, PPTX, PPT, TXT, CSV
 """
 
+import codecs
+import hashlib
+import io
+import mmap
 import os
-from pathlib import Path
-from typing import List, Dict, Any
+import posixpath
+import tempfile
+import zipfile
+from functools import lru_cache
+from typing import IO, List, Dict, Any, Optional, Tuple
 import logging
 
-# Importações para diferentes tipos de arquivo
-import pypdf
-from docx import Document
-import openpyxl
-from pptx import Presentation
+# Parsers (pypdf, docx, openpyxl, lxml) são importados sob demanda em cada extrator
 
 logger = logging.getLogger(__name__)
 
+# Namespaces do XML de apresentações PowerPoint
+_A_NS = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+_P_NS = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+_R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+# Diretório do cache de textos extraídos (chaveado pelo hash do conteúdo do arquivo)
+EXTRACT_CACHE_DIR = os.getenv("EXTRACT_CACHE_DIR", ".cache/extracts")
+# Tamanho máximo do cache em disco; acima disso as entradas menos usadas são removidas
+EXTRACT_CACHE_MAX_BYTES = int(os.getenv("EXTRACT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Amostra usada para detectar o encoding de TXT/CSV que não são UTF-8
+TEXT_DETECT_SAMPLE_SIZE = 64 * 1024
+
+# TXT/CSV a partir deste tamanho são lidos via mmap em blocos
+TEXT_MMAP_MIN_SIZE = 1024 * 1024
+TEXT_READ_BLOCK_SIZE = 1024 * 1024
+
+# PDFs com menos páginas que isso são extraídos em série (custo do pool não compensa)
+PDF_PARALLEL_MIN_PAGES = 4
+
+_PDF_READER = None
+
+
+def _init_pdf_worker(pdf_bytes: bytes):
+    """Abre o PDF uma única vez em cada processo do pool"""
+    import pypdf
+    
+    global _PDF_READER
+    _PDF_READER = pypdf.PdfReader(io.BytesIO(pdf_bytes))
+
+
+def _extract_pdf_page(page_index: int):
+    """Extrai o texto de uma página (executa nos processos do pool)"""
+    return page_index, _PDF_READER.pages[page_index].extract_text()
+
+
+def _extract_worker(file_path: str, cache_path: str):
+    """Extrai e grava no cache o texto de um arquivo (executa nos processos do pool)"""
+    text = FileProcessor.extract_text(file_path)
+    _store_cached_extract(cache_path, text)
+    return file_path, text
+
+
+def _file_content_hash(file_path: str) -> str:
+    """Hash BLAKE2b do conteúdo completo do arquivo"""
+    with open(file_path, 'rb') as file:
+        return hashlib.file_digest(file, "blake2b").hexdigest()
+
+
+def _write_atomic(path: str, content: str):
+    """Grava via arquivo temporário no mesmo diretório + os.replace"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+            tmp_file.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@lru_cache(maxsize=32)
+def _read_cached_extract(cache_path: str) -> str:
+    """Camada em memória sobre o cache em disco (arquivos são imutáveis por hash)"""
+    with open(cache_path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def _lookup_cached_extract(cache_dir: str, file_path: str) -> Tuple[Optional[str], str]:
+    """
+    Busca o texto extraído no cache pelo hash completo do conteúdo (uma leitura do arquivo).
+    Retorna (texto ou None, caminho da entrada para gravar na falta).
+    """
+    cache_path = os.path.join(cache_dir, f"{_file_content_hash(file_path)}.txt")
+    if not os.path.exists(cache_path):
+        return None, cache_path
+    try:
+        os.utime(cache_path)  # marca uso recente (a limpeza remove as entradas mais antigas)
+    except OSError:
+        pass
+    return _read_cached_extract(cache_path), cache_path
+
+
+def _store_cached_extract(cache_path: str, text: str):
+    """Grava o texto no cache e aplica o limite EXTRACT_CACHE_MAX_BYTES"""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        _write_atomic(cache_path, text)
+        _prune_extract_cache(os.path.dirname(cache_path))
+    except OSError as e:
+        logger.warning(f"Não foi possível gravar cache de extração: {e}")
+
+
+def _prune_extract_cache(cache_dir: str):
+    """Remove as entradas usadas há mais tempo até o cache caber em EXTRACT_CACHE_MAX_BYTES"""
+    entries = []
+    total = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+    if total <= EXTRACT_CACHE_MAX_BYTES:
+        return
+    for _, size, path in sorted(entries):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        if total <= EXTRACT_CACHE_MAX_BYTES:
+            break
+
+
+def _row(row) -> str:
+    """Linha de planilha como texto (sem str() em células que já são strings)"""
+    return " | ".join(
+        "" if cell is None else cell if type(cell) is str else str(cell)
+        for cell in row
+    )
+
+
+def _calamine_row(row) -> str:
+    """Como _row, mas com floats inteiros escritos como int (calamine lê números como float; openpyxl não)"""
+    return _row(
+        int(cell) if type(cell) is float and cell.is_integer() else cell
+        for cell in row
+    )
+
+
+class _JoinWriter:
+    """Escreve partes separadas por `sep` em um buffer (equivale a sep.join(partes))"""
+    
+    def __init__(self, out: IO[str], sep: str):
+        self.out = out
+        self.sep = sep
+        self.started = False
+    
+    def write(self, part: str):
+        if self.started:
+            self.out.write(self.sep)
+        else:
+            self.started = True
+        self.out.write(part)
+
 
 class FileProcessor:
     """Processa diferentes tipos de arquivos e extrai texto"""
@@ -32,134 +181,376 @@ class FileProcessor:
         '.csv': 'CSV File',
     }
     
+    # Extensão -> nome do método extrator
+    _DISPATCH = {
+        '.pdf': '_extract_from_pdf',
+        '.docx': '_extract_from_docx',
+        '.xlsx': '_extract_from_excel',
+        '.xls': '_extract_from_excel',
+        '.pptx': '_extract_from_pptx',
+        '.txt': '_extract_from_text',
+        '.csv': '_extract_from_text',
+        '.doc': '_extract_from_doc_legacy',  # Para .doc antigo, tenta usar unstructured
+        '.ppt': '_extract_from_ppt_legacy',  # Para .ppt antigo, tenta usar unstructured
+    }
+    
+    @staticmethod
+    def _get_extension(file_path: str) -> str:
+        """Extensão do arquivo em minúsculas"""
+        return os.path.splitext(file_path)[1].lower()
+    
     @classmethod
     def is_supported(cls, file_path: str) -> bool:
         """Verifica se o arquivo é suportado"""
-        ext = Path(file_path).suffix.lower()
-        return ext in cls.SUPPORTED_EXTENSIONS
+        return cls._get_extension(file_path) in cls.SUPPORTED_EXTENSIONS
     
     @classmethod
     def get_file_type(cls, file_path: str) -> str:
         """Retorna o tipo do arquivo"""
-        ext = Path(file_path).suffix.lower()
-        return cls.SUPPORTED_EXTENSIONS.get(ext, 'Unknown')
+        return cls.SUPPORTED_EXTENSIONS.get(cls._get_extension(file_path), 'Unknown')
     
     @classmethod
     def extract_text(cls, file_path: str) -> str:
         """Extrai texto do arquivo baseado na extensão"""
-        ext = Path(file_path).suffix.lower()
+        ext = cls._get_extension(file_path)
+        method_name = cls._DISPATCH.get(ext)
         
-        if not cls.is_supported(file_path):
+        if method_name is None:
             raise ValueError(f"Tipo de arquivo não suportado: {ext}")
         
         try:
-            if ext == '.pdf':
-                return cls._extract_from_pdf(file_path)
-            elif ext == '.docx':
-                return cls._extract_from_docx(file_path)
-            elif ext in ['.xlsx', '.xls']:
-                return cls._extract_from_excel(file_path)
-            elif ext == '.pptx':
-                return cls._extract_from_pptx(file_path)
-            elif ext in ['.txt', '.csv']:
-                return cls._extract_from_text(file_path)
-            elif ext == '.doc':
-                # Para .doc antigo, tenta usar unstructured
-                return cls._extract_from_doc_legacy(file_path)
-            elif ext == '.ppt':
-                # Para .ppt antigo, tenta usar unstructured
-                return cls._extract_from_ppt_legacy(file_path)
-            else:
-                raise ValueError(f"Processador não implementado para: {ext}")
-                
+            return getattr(cls, method_name)(file_path)
         except Exception as e:
             logger.error(f"Erro ao processar arquivo {file_path}: {str(e)}")
             raise
     
+    @classmethod
+    def extract_text_cached(cls, file_path: str, cache_dir: str = None) -> str:
+        """
+        Extrai texto usando cache chaveado pelo hash completo do conteúdo.
+        Reenvios do mesmo arquivo leem o texto já extraído em vez de reprocessar.
+        """
+        cached, cache_path = _lookup_cached_extract(cache_dir or EXTRACT_CACHE_DIR, file_path)
+        if cached is not None:
+            return cached
+        
+        text = cls.extract_text(file_path)
+        _store_cached_extract(cache_path, text)
+        return text
+    
     @staticmethod
-    def _extract_from_pdf(file_path: str) -> str:
-        """Extrai texto de PDF"""
-        text_parts = []
+    def evict_cached_extract(file_path: str, cache_dir: str = None):
+        """Remove do cache o texto extraído de um arquivo (chamar antes de apagá-lo)"""
+        cache_path = os.path.join(cache_dir or EXTRACT_CACHE_DIR, f"{_file_content_hash(file_path)}.txt")
+        try:
+            os.unlink(cache_path)
+        except FileNotFoundError:
+            pass
+        _read_cached_extract.cache_clear()
+    
+    @classmethod
+    def extract_many(cls, paths: List[str], workers: Optional[int] = None) -> Dict[str, str]:
+        """
+        Extrai texto de vários arquivos em paralelo (um processo por arquivo).
+        Arquivos já presentes no cache são lidos direto, sem passar pelo pool.
+        """
+        results = {}
+        pending = {}
+        for path in paths:
+            cached, cache_path = _lookup_cached_extract(EXTRACT_CACHE_DIR, path)
+            if cached is not None:
+                results[path] = cached
+            else:
+                pending[path] = cache_path
+        
+        if pending:
+            from concurrent.futures import ProcessPoolExecutor
+            workers = workers or min(len(pending), os.cpu_count() or 4)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results.update(executor.map(_extract_worker, pending.keys(), pending.values(), chunksize=1))
+        
+        return {path: results[path] for path in paths}
+    
+    @classmethod
+    def _extract_from_pdf(cls, file_path: str, out: Optional[IO[str]] = None) -> Optional[str]:
+        """Extrai texto de PDF (pypdfium2 como motor principal, pypdf como fallback)"""
+        try:
+            page_texts = cls._extract_pdf_pages_pdfium(file_path)
+        except Exception as e:
+            logger.warning(f"pypdfium2 indisponível ou falhou, usando pypdf: {e}")
+            page_texts = cls._extract_pdf_pages_pypdf(file_path)
+        
+        buf = out or io.StringIO()
+        writer = _JoinWriter(buf, "\n\n")
+        for page_num, text in enumerate(page_texts):
+            if text.strip():
+                writer.write(f"--- Página {page_num + 1} ---\n{text}")
+        
+        return buf.getvalue() if out is None else None
+    
+    @staticmethod
+    def _extract_pdf_pages_pdfium(file_path: str) -> List[str]:
+        """Extrai o texto de cada página com pypdfium2 (PDFium, código nativo)"""
+        import pypdfium2 as pdfium
+        
+        pdf = pdfium.PdfDocument(file_path)
+        page_texts = []
+        try:
+            for page in pdf:
+                textpage = page.get_textpage()
+                # PDFium separa linhas com \r\n; normaliza para \n como o pypdf
+                page_texts.append(textpage.get_text_range().replace("\r\n", "\n"))
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+        
+        return page_texts
+    
+    @staticmethod
+    def _extract_pdf_pages_pypdf(file_path: str) -> List[str]:
+        """Extrai o texto de cada página com pypdf (em paralelo para PDFs maiores)"""
+        import pypdf
+        
         with open(file_path, 'rb') as file:
-            pdf_reader = pypdf.PdfReader(file)
-            for page_num, page in enumerate(pdf_reader.pages):
-                text = page.extract_text()
-                if text.strip():
-                    text_parts.append(f"--- Página {page_num + 1} ---\n{text}")
+            pdf_bytes = file.read()
+        
+        pdf_reader = pypdf.PdfReader(io.BytesIO(pdf_bytes))
+        num_pages = len(pdf_reader.pages)
+        
+        if num_pages >= PDF_PARALLEL_MIN_PAGES:
+            from concurrent.futures import ProcessPoolExecutor
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=min(8, os.cpu_count() or 1),
+                    initializer=_init_pdf_worker,
+                    initargs=(pdf_bytes,)
+                ) as executor:
+                    return [text for _, text in sorted(
+                        executor.map(_extract_pdf_page, range(num_pages), chunksize=4)
+                    )]
+            except Exception as e:
+                # Ex.: processo daemônico (worker prefork) não pode criar filhos
+                logger.warning(f"Extração paralela de PDF indisponível, usando modo serial: {e}")
         
-        return "\n\n".join(text_parts)
+        return [page.extract_text() for page in pdf_reader.pages]
     
     @staticmethod
-    def _extract_from_docx(file_path: str) -> str:
+    def _extract_from_docx(file_path: str, out: Optional[IO[str]] = None) -> Optional[str]:
         """Extrai texto de DOCX"""
+        from docx import Document
+        from docx.oxml.ns import qn
+        
         doc = Document(file_path)
-        text_parts = []
+        buf = out or io.StringIO()
+        writer = _JoinWriter(buf, "\n\n")
         
         # Extrair parágrafos
         for para in doc.paragraphs:
             if para.text.strip():
-                text_parts.append(para.text)
+                writer.write(para.text)
         
-        # Extrair tabelas
+        # Extrair tabelas direto da árvore XML (uma passada, sem objetos por célula)
+        w_tr, w_tc, w_p, w_t = qn('w:tr'), qn('w:tc'), qn('w:p'), qn('w:t')
         for table in doc.tables:
-            for row in table.rows:
-                row_text = " | ".join([cell.text.strip() for cell in row.cells])
+            for tr in table._tbl.iterchildren(w_tr):
+                row_text = " | ".join(
+                    "\n".join(
+                        "".join(t.text or "" for t in p.iter(w_t))
+                        for p in tc.iterchildren(w_p)
+                    ).strip()
+                    for tc in tr.iterchildren(w_tc)
+                )
                 if row_text.strip():
-                    text_parts.append(row_text)
+                    writer.write(row_text)
         
-        return "\n\n".join(text_parts)
+        return buf.getvalue() if out is None else None
     
-    @staticmethod
-    def _extract_from_excel(file_path: str) -> str:
-        """Extrai texto de Excel"""
-        workbook = openpyxl.load_workbook(file_path, data_only=True)
-        text_parts = []
-        
-        for sheet_name in workbook.sheetnames:
-            sheet = workbook[sheet_name]
-            text_parts.append(f"=== Planilha: {sheet_name} ===")
+    @classmethod
+    def _extract_from_excel(cls, file_path: str, out: Optional[IO[str]] = None) -> Optional[str]:
+        """Extrai texto de Excel (.xlsx e .xls) usando python-calamine (Rust)"""
+        try:
+            from python_calamine import CalamineWorkbook
+        except ImportError:
+            return cls._extract_from_excel_openpyxl(file_path, out)
+        
+        workbook = CalamineWorkbook.from_path(file_path)
+        buf = out or io.StringIO()
+        writer = _JoinWriter(buf, "\n")
+        
+        for sheet_name in workbook.sheet_names:
+            sheet = workbook.get_sheet_by_name(sheet_name)
+            writer.write(f"=== Planilha: {sheet_name} ===")
             
-            for row in sheet.iter_rows(values_only=True):
-                row_text = " | ".join([str(cell) if cell is not None else "" for cell in row])
+            for row in sheet.iter_rows():
+                row_text = _calamine_row(row)
                 if row_text.strip():
-                    text_parts.append(row_text)
+                    writer.write(row_text)
             
-            text_parts.append("")  # Linha em branco entre planilhas
+            writer.write("")  # Linha em branco entre planilhas
         
-        return "\n".join(text_parts)
+        return buf.getvalue() if out is None else None
     
     @staticmethod
-    def _extract_from_pptx(file_path: str) -> str:
-        """Extrai texto de PowerPoint"""
-        prs = Presentation(file_path)
-        text_parts = []
+    def _extract_from_excel_openpyxl(file_path: str, out: Optional[IO[str]] = None) -> Optional[str]:
+        """Extrai texto de Excel com openpyxl (fallback sem python-calamine)"""
+        import openpyxl
         
-        for slide_num, slide in enumerate(prs.slides, 1):
-            text_parts.append(f"=== Slide {slide_num} ===")
-            
-            for shape in slide.shapes:
-                if hasattr(shape, "text") and shape.text.strip():
-                    text_parts.append(shape.text)
-            
-            text_parts.append("")  # Linha em branco entre slides
+        # read_only: lê as linhas em streaming do XML em vez de montar a grade inteira
+        workbook = openpyxl.load_workbook(file_path, data_only=True, read_only=True)
+        buf = out or io.StringIO()
+        writer = _JoinWriter(buf, "\n")
+        
+        try:
+            for sheet_name in workbook.sheetnames:
+                sheet = workbook[sheet_name]
+                writer.write(f"=== Planilha: {sheet_name} ===")
+                
+                for row in sheet.iter_rows(values_only=True):
+                    row_text = _row(row)
+                    if row_text.strip():
+                        writer.write(row_text)
+                
+                writer.write("")  # Linha em branco entre planilhas
+        finally:
+            workbook.close()
         
-        return "\n\n".join(text_parts)
+        return buf.getvalue() if out is None else None
     
     @staticmethod
-    def _extract_from_text(file_path: str) -> str:
-        """Extrai texto de arquivo TXT ou CSV"""
-        encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+    def _pptx_slide_names(archive: zipfile.ZipFile) -> List[str]:
+        """Partes XML dos slides na ordem da apresentação"""
+        from lxml import etree
         
-        for encoding in encodings:
+        names = set(archive.namelist())
+        try:
+            rels = etree.fromstring(archive.read('ppt/_rels/presentation.xml.rels'))
+            targets = {}
+            for rel in rels:
+                target = rel.get('Target') or ''
+                targets[rel.get('Id')] = (
+                    target.lstrip('/') if target.startswith('/')
+                    else posixpath.normpath(posixpath.join('ppt', target))
+                )
+            presentation = etree.fromstring(archive.read('ppt/presentation.xml'))
+            ordered = [
+                targets.get(sld_id.get(f'{{{_R_NS}}}id'))
+                for sld_id in presentation.iter(f'{{{_P_NS}}}sldId')
+            ]
+            ordered = [name for name in ordered if name in names]
+            if ordered:
+                return ordered
+        except (KeyError, etree.XMLSyntaxError):
+            pass
+        
+        # Fallback: ordem numérica de ppt/slides/slideN.xml
+        slides = [
+            n for n in names
+            if n.startswith('ppt/slides/slide') and n.endswith('.xml')
+        ]
+        return sorted(slides, key=lambda n: int(''.join(filter(str.isdigit, posixpath.basename(n))) or 0))
+    
+    @classmethod
+    def _extract_from_pptx(cls, file_path: str, out: Optional[IO[str]] = None) -> Optional[str]:
+        """Extrai texto de PowerPoint lendo o XML dos slides direto do zip"""
+        from lxml import etree
+        
+        buf = out or io.StringIO()
+        writer = _JoinWriter(buf, "\n\n")
+        tx_body, a_p, a_t = f'{{{_P_NS}}}txBody', f'{{{_A_NS}}}p', f'{{{_A_NS}}}t'
+        
+        with zipfile.ZipFile(file_path) as archive:
+            for slide_num, name in enumerate(cls._pptx_slide_names(archive), 1):
+                writer.write(f"=== Slide {slide_num} ===")
+                
+                with archive.open(name) as slide_xml:
+                    # Cada txBody é o texto de uma forma (parágrafos separados por \n)
+                    for _, body in etree.iterparse(slide_xml, tag=tx_body):
+                        text = "\n".join(
+                            "".join(t.text or "" for t in para.iter(a_t))
+                            for para in body.iterchildren(a_p)
+                        )
+                        if text.strip():
+                            writer.write(text)
+                        body.clear()
+                
+                writer.write("")  # Linha em branco entre slides
+        
+        return buf.getvalue() if out is None else None
+    
+    @staticmethod
+    def _detect_encoding(sample: bytes) -> str:
+        """Detecta o encoding de uma amostra (latin-1 se não for possível)"""
+        try:
+            from charset_normalizer import from_bytes
+            best = from_bytes(sample).best()
+            if best is not None:
+                codecs.lookup(best.encoding)
+                return best.encoding
+        except (ImportError, LookupError):
+            pass
+        
+        # latin-1 decodifica qualquer sequência de bytes
+        return 'latin-1'
+    
+    @staticmethod
+    def _fallback_encodings(encoding: str) -> List[str]:
+        """
+        Ordem de tentativa da decodificação estrita: o encoding detectado (a amostra
+        pode ser só ASCII), depois cp1252 e por fim latin-1, que aceita qualquer byte.
+        """
+        if codecs.lookup(encoding).name == 'iso8859-1':
+            return [encoding]
+        candidates = [encoding]
+        if codecs.lookup(encoding).name != 'cp1252':
+            candidates.append('cp1252')
+        candidates.append('latin-1')
+        return candidates
+    
+    @staticmethod
+    def _decode_mmap(mm: mmap.mmap, encoding: str, errors: str = 'strict') -> str:
+        """Decodifica o arquivo mapeado em blocos de 1 MiB (sem cópia completa dos bytes)"""
+        decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        buf = io.StringIO()
+        mm.seek(0)
+        for block in iter(lambda: mm.read(TEXT_READ_BLOCK_SIZE), b''):
+            buf.write(decoder.decode(block))
+        buf.write(decoder.decode(b'', final=True))
+        return buf.getvalue()
+    
+    @classmethod
+    def _extract_from_text(cls, file_path: str) -> str:
+        """Extrai texto de arquivo TXT ou CSV (lê o arquivo uma única vez)"""
+        if os.path.getsize(file_path) >= TEXT_MMAP_MIN_SIZE:
+            # Arquivos grandes: mmap (páginas sob demanda) + decodificação incremental
+            with open(file_path, 'rb') as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                try:
+                    return cls._decode_mmap(mm, 'utf-8')
+                except UnicodeDecodeError:
+                    pass
+                encoding = cls._detect_encoding(mm[:TEXT_DETECT_SAMPLE_SIZE])
+                for candidate in cls._fallback_encodings(encoding):
+                    try:
+                        return cls._decode_mmap(mm, candidate)
+                    except UnicodeDecodeError:
+                        continue
+        
+        with open(file_path, 'rb') as file:
+            raw = file.read()
+        
+        try:
+            return raw.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+        
+        # Detecta o encoding por uma amostra e decodifica o conteúdo completo
+        encoding = cls._detect_encoding(raw[:TEXT_DETECT_SAMPLE_SIZE])
+        for candidate in cls._fallback_encodings(encoding):
             try:
-                with open(file_path, 'r', encoding=encoding) as file:
-                    return file.read()
+                return raw.decode(candidate)
             except UnicodeDecodeError:
                 continue
-        
-        # Se nenhum encoding funcionar, tenta com errors='ignore'
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            return file.read()
     
     @staticmethod
     def _extract_from_doc_legacy(file_path: str) -> str:
@@ -2,6 +2,9 @@ import { NextRequest, NextResponse } from "next/server"
 
 const API_BASE_URL = (process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000").replace(/\/+$/, "")
 
+// Cabeçalhos de cache HTTP repassados da API para o navegador (revalidação com If-None-Match)
+const CACHE_HEADERS = ["etag", "cache-control"]
+
 export async function GET(request: NextRequest, { params }: { params: Promise<{ slug: string[] }> }) {
   const { slug } = await params
   const path = `/${slug.join("/")}`
@@ -16,14 +19,46 @@ export async function GET(request: NextRequest, { params }: { params: Promise<{
       headers["Authorization"] = `Bearer ${token}`
     }
 
+    const ifNoneMatch = request.headers.get("if-none-match")
+    if (ifNoneMatch) {
+      headers["If-None-Match"] = ifNoneMatch
+    }
+
     const response = await fetch(`${API_BASE_URL}${path}${request.nextUrl.search}`, {
       method: "GET",
       headers,
+      // Cancela a requisição à API quando o navegador desconecta (ex.: EventSource fechado)
+      signal: request.signal,
     })
 
+    const responseHeaders = new Headers()
+    for (const name of CACHE_HEADERS) {
+      const value = response.headers.get(name)
+      if (value) {
+        responseHeaders.set(name, value)
+      }
+    }
+
+    // 304 não tem corpo: o navegador reaproveita a resposta que já está em cache
+    if (response.status === 304) {
+      return new NextResponse(null, { status: 304, headers: responseHeaders })
+    }
+
+    // Server-Sent Events (/status/{id}/stream): repassa o corpo em streaming, sem bufferizar
+    if (response.headers.get("content-type")?.includes("text/event-stream")) {
+      return new NextResponse(response.body, {
+        status: response.status,
+        headers: {
+          "Content-Type": "text/event-stream",
+          "Cache-Control": "no-cache",
+          "X-Accel-Buffering": "no",
+        },
+      })
+    }
+
     const data = await response.json()
 
-    return NextResponse.json(data, { status: response.status })
+    return NextResponse.json(data, { status: response.status, headers: responseHeaders })
   } catch (error) {
     console.error("Proxy error:", error)
     return NextResponse.json({ error: "Proxy error" }, { status: 500 })
@@ -2,6 +2,9 @@ import { type NextRequest, NextResponse } from "next/server"
 
 const API_BASE = (process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000").replace(/\/+$/, "")
 
+// Cabeçalhos de cache HTTP repassados da API para o navegador (revalidação com If-None-Match)
+const CACHE_HEADERS = ["etag", "cache-control"]
+
 export async function GET(request: NextRequest) {
   const token = request.cookies.get("api_token")?.value
 
@@ -10,14 +13,34 @@ export async function GET(request: NextRequest) {
   }
 
   try {
-    const response = await fetch(`${API_BASE}/documents`, {
+    const headers: HeadersInit = {
+      Authorization: `Bearer ${token}`,
+      Accept: "application/json",
+    }
+    const ifNoneMatch = request.headers.get("if-none-match")
+    if (ifNoneMatch) {
+      headers["If-None-Match"] = ifNoneMatch
+    }
+
+    // Repassa filtros, busca, ordenação e paginação (?status=&q=&sort=&limit=&offset=)
+    const response = await fetch(`${API_BASE}/documents${request.nextUrl.search}`, {
       method: "GET",
-      headers: {
-        Authorization: `Bearer ${token}`,
-        Accept: "application/json",
-      },
+      headers,
     })
 
+    const responseHeaders = new Headers()
+    for (const name of CACHE_HEADERS) {
+      const value = response.headers.get(name)
+      if (value) {
+        responseHeaders.set(name, value)
+      }
+    }
+
+    // 304 não tem corpo: o navegador reaproveita a lista que já está em cache
+    if (response.status === 304) {
+      return new NextResponse(null, { status: 304, headers: responseHeaders })
+    }
+
     // Check if response is JSON
     const contentType = response.headers.get("content-type")
     if (!contentType || !contentType.includes("application/json")) {
@@ -30,7 +53,7 @@ export async function GET(request: NextRequest) {
     }
 
     const data = await response.json()
-    return NextResponse.json(data, { status: response.status })
+    return NextResponse.json(data, { status: response.status, headers: responseHeaders })
   } catch (error) {
     console.error("[v0] Erro ao listar documentos:", error)
     return NextResponse.json({ error: "Erro ao listar documentos" }, { status: 500 })
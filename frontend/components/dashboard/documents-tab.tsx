@@ -54,45 +54,49 @@ export default function DocumentsTab({ fileInputRef }: DocumentsTabProps) {
     loadDocuments()
   }, [])
 
-  // Polling for processing documents - use status endpoint
-  const processingDocs = documents.filter(d => d.status === "Processing")
+  // Acompanha documentos em processamento via SSE (/status/{id}/stream) em vez de polling
+  const processingIds = documents
+    .filter(d => d.status === "Processing")
+    .map(d => d.document_id)
+    .join(",")
 
   useEffect(() => {
-    if (processingDocs.length === 0) return
-
-    const checkStatuses = async () => {
-      try {
-        const statusPromises = processingDocs.map(doc =>
-          apiClient.getDocumentStatus(doc.document_id).catch(() => null)
-        )
-        const statuses = await Promise.all(statusPromises)
-
-        // Verificar se algum documento terminou de processar
-        const anyCompleted = statuses.some((s: any) =>
-          s && (s.status === "Completed" || s.status === "Failed")
-        )
-
-        // Se algum completou, recarrega a lista completa para pegar todas as infos
-        if (anyCompleted) {
+    if (!processingIds) return
+
+    const sources = processingIds.split(",").map(documentId => {
+      const source = new EventSource(apiClient.getDocumentStatusStreamUrl(documentId))
+
+      source.onmessage = (event) => {
+        const status = JSON.parse(event.data)
+
+        // Saiu de Processing: recarrega a lista completa para pegar todas as infos
+        if (status.status !== "Processing") {
+          source.close()
           loadDocuments()
-        } else {
-          // Apenas atualizar o progresso
-          setDocuments(prevDocs => prevDocs.map(doc => {
-            const newStatus = statuses.find((s: any) => s?.document_id === doc.document_id)
-            if (newStatus) {
-              return { ...doc, status: newStatus.status, progress: newStatus.progress, error: newStatus.error }
-            }
-            return doc
-          }))
+          return
         }
-      } catch (err) {
-        console.error("Erro ao verificar status:", err)
+
+        // Apenas atualizar o progresso
+        setDocuments(prevDocs => prevDocs.map(doc =>
+          doc.document_id === status.document_id
+            ? { ...doc, status: status.status, progress: status.progress, error: status.error }
+            : doc
+        ))
       }
-    }
 
-    const interval = setInterval(checkStatuses, 3000)
-    return () => clearInterval(interval)
-  }, [processingDocs.length])
+      // Conexão encerrada pelo servidor (timeout do stream) reconecta sozinha;
+      // respostas de erro (401, 404) fecham o EventSource
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) {
+          console.error("Stream de status encerrado:", documentId)
+        }
+      }
+
+      return source
+    })
+
+    return () => sources.forEach(source => source.close())
+  }, [processingIds])
 
   const loadDocuments = async () => {
     setIsLoading(true)
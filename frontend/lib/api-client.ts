@@ -155,6 +155,11 @@ export const apiClient = {
     return checkResponse(response, "Falha ao buscar chunks do documento")
   },
 
+  // URL do stream SSE de status (EventSource envia o cookie api_token ao proxy)
+  getDocumentStatusStreamUrl(documentId: string) {
+    return `${API_BASE_URL}/status/${encodeURIComponent(documentId)}/stream`
+  },
+
   async getDocumentStatus(documentId: string) {
     const response = await fetch(`${API_BASE_URL}/documents/status/${documentId}`, {
       headers: await this.getHeaders(),
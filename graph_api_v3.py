@@ -4,10 +4,16 @@ Endpoints separados para upload, processamento, status e query.
 Suporta autenticação JWT e múltiplos formatos de arquivo.
 """
 
+import asyncio
 import os
+import time
 import uuid
 import hashlib
 import logging
+import threading
+import orjson
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
@@ -15,24 +21,23 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Form, Query, Header, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
-from neo4j import GraphDatabase
 
 from llama_index.core import Settings, VectorStoreIndex
-from llama_index.embeddings.openai import OpenAIEmbedding
-from llama_index.llms.anthropic import Anthropic
-from llama_index.llms.openai import OpenAI as LlamaOpenAI
 
 from llm_providers import LLMProvider
 from neo4j_store import CustomNeo4jVectorStore
 from celery_worker import process_document_task
 from auth import (
     Token, User, authenticate_user, create_access_token, 
-    get_current_active_user, ACCESS_TOKEN_EXPIRE_MINUTES
+    get_current_active_user, ACCESS_TOKEN_EXPIRE_MINUTES,
+    get_neo4j_driver as auth_get_neo4j_driver, close_neo4j_driver
 )
 from file_processor import FileProcessor
+from extraction_prompts import PROMPTS_BY_TYPE
 
 # Configuração de logging
 logging.basicConfig(format="%(asctime)s - %(message)s", level="INFO")
@@ -41,16 +46,32 @@ logging.basicConfig(format="%(asctime)s - %(message)s", level="INFO")
 from llm_providers import LLMProvider
 Settings.embed_model = LLMProvider.get_embedding_model("claude")  # retorna local por padrão
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Ciclo de vida da API: fecha o driver Neo4j compartilhado no shutdown"""
+    yield
+    close_neo4j_driver()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="GraphRAG API v3",
     description="API assíncrona para processamento de documentos com GraphRAG. Suporta PDF, Word, Excel, PowerPoint e mais.",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=ORJSONResponse  # serialização JSON via orjson (mais rápida que json da stdlib)
 )
 
 # Criar pasta de uploads
 UPLOAD_DIR = Path("./uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Tamanho do bloco usado para gravar uploads em disco
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Assinatura (magic bytes) de arquivos PDF; leitores aceitam o cabeçalho em qualquer
+# posição dos primeiros 1024 bytes
+PDF_MAGIC = b"%PDF-"
+PDF_HEADER_SEARCH_SIZE = 1024
+
 from fastapi.staticfiles import StaticFiles
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
@@ -111,11 +132,8 @@ class QueryResponse(BaseModel):
 # Database Connection
 # ============================================
 
-def get_neo4j_driver():
-    return GraphDatabase.driver(
-        os.getenv("NEO4J_URI"),
-        auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
-    )
+# Driver único do processo, compartilhado com auth.py (não fechar nos endpoints)
+get_neo4j_driver = auth_get_neo4j_driver
 
 
 def get_neo4j_database():
@@ -127,7 +145,7 @@ def get_neo4j_database():
 # ============================================
 
 @app.post("/auth/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """
     Endpoint de autenticação - retorna token JWT.
     
@@ -164,14 +182,14 @@ from auth import (
 )
 
 @app.get("/users")
-async def get_users(current_user: User = Depends(get_current_admin_user)):
+def get_users(current_user: User = Depends(get_current_admin_user)):
     """Lista todos os usuários (admin only)"""
     users = list_users()
     return {"users": [u.model_dump() for u in users], "total": len(users)}
 
 
 @app.post("/users")
-async def create_new_user(
+def create_new_user(
     user_data: UserCreate,
     current_user: User = Depends(get_current_admin_user)
 ):
@@ -184,7 +202,7 @@ async def create_new_user(
 
 
 @app.get("/users/{user_id}")
-async def get_user_details(
+def get_user_details(
     user_id: str,
     current_user: User = Depends(get_current_admin_user)
 ):
@@ -196,7 +214,7 @@ async def get_user_details(
 
 
 @app.put("/users/{user_id}")
-async def update_user_details(
+def update_user_details(
     user_id: str,
     user_data: UserUpdate,
     current_user: User = Depends(get_current_admin_user)
@@ -209,7 +227,7 @@ async def update_user_details(
 
 
 @app.delete("/users/{user_id}")
-async def delete_user_by_id(
+def delete_user_by_id(
     user_id: str,
     current_user: User = Depends(get_current_admin_user)
 ):
@@ -235,14 +253,14 @@ from auth import (
 )
 
 @app.get("/groups")
-async def get_groups(current_user: User = Depends(get_current_active_user)):
+def get_groups(current_user: User = Depends(get_current_active_user)):
     """Lista todos os grupos"""
     groups = list_groups()
     return {"groups": [g.model_dump() for g in groups], "total": len(groups)}
 
 
 @app.post("/groups")
-async def create_new_group(
+def create_new_group(
     group_data: GroupCreate,
     current_user: User = Depends(get_current_admin_user)
 ):
@@ -255,7 +273,7 @@ async def create_new_group(
 
 
 @app.get("/groups/{group_id}")
-async def get_group_details(
+def get_group_details(
     group_id: str,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -267,7 +285,7 @@ async def get_group_details(
 
 
 @app.put("/groups/{group_id}")
-async def update_group_details(
+def update_group_details(
     group_id: str,
     group_data: GroupUpdate,
     current_user: User = Depends(get_current_admin_user)
@@ -280,7 +298,7 @@ async def update_group_details(
 
 
 @app.delete("/groups/{group_id}")
-async def delete_group_by_id(
+def delete_group_by_id(
     group_id: str,
     current_user: User = Depends(get_current_admin_user)
 ):
@@ -292,7 +310,7 @@ async def delete_group_by_id(
 
 
 @app.get("/groups/{group_id}/members")
-async def list_group_members(
+def list_group_members(
     group_id: str,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -306,7 +324,7 @@ async def list_group_members(
 
 
 @app.post("/groups/{group_id}/members")
-async def add_member_to_group(
+def add_member_to_group(
     group_id: str,
     member: GroupMember,
     current_user: User = Depends(get_current_admin_user)
@@ -323,7 +341,7 @@ async def add_member_to_group(
 
 
 @app.delete("/groups/{group_id}/members/{user_id}")
-async def remove_member_from_group(
+def remove_member_from_group(
     group_id: str,
     user_id: str,
     current_user: User = Depends(get_current_admin_user)
@@ -345,7 +363,7 @@ from auth import (
 )
 
 @app.get("/documents/{document_id}/permissions")
-async def get_document_permissions(
+def get_document_permissions(
     document_id: str,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -362,7 +380,7 @@ async def get_document_permissions(
 
 
 @app.post("/documents/{document_id}/share")
-async def share_document_endpoint(
+def share_document_endpoint(
     document_id: str,
     share_data: ShareRequest,
     current_user: User = Depends(get_current_active_user)
@@ -392,7 +410,7 @@ async def share_document_endpoint(
 
 
 @app.delete("/documents/{document_id}/share/{entity_type}/{entity_id}")
-async def unshare_document_endpoint(
+def unshare_document_endpoint(
     document_id: str,
     entity_type: str,
     entity_id: str,
@@ -432,22 +450,36 @@ async def upload_document(
             detail=f"Tipo de arquivo não suportado. Formatos aceitos: {supported}"
         )
     
+    # PDF: confere só os primeiros bytes, antes de gravar em disco ou criar o nó
+    if file_extension == ".pdf":
+        header = await file.read(PDF_HEADER_SEARCH_SIZE)
+        await file.seek(0)
+        if PDF_MAGIC not in header:
+            raise HTTPException(status_code=400, detail="Arquivo PDF inválido")
+    
     # Gerar ID único
     document_id = str(uuid.uuid4())
     
     # Salvar arquivo
     file_path = UPLOAD_DIR / f"{document_id}_{file.filename}"
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    # Copia em blocos: o arquivo inteiro nunca fica em memória.
+    # E/S de disco em thread, para não bloquear o event loop em uploads grandes
+    file_size = 0
+    f = await asyncio.to_thread(open, file_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await asyncio.to_thread(f.write, chunk)
+            file_size += len(chunk)
+    finally:
+        await asyncio.to_thread(f.close)
     
-    file_size = len(content)
     file_type = file_extension.replace(".", "")
     
-    # Criar nó Document no Neo4j
+    # Criar nó Document no Neo4j (numa thread, para não bloquear o event loop)
     driver = get_neo4j_driver()
     database = get_neo4j_database()
-    try:
+    
+    def create_document_node():
         with driver.session(database=database) as session:
             logging.info(f"Criando documento no banco: {database}, ID: {document_id}")
             session.run("""
@@ -475,8 +507,8 @@ async def upload_document(
                 owner_id=current_user.username
             )
             logging.info(f"Documento criado com sucesso: {document_id}")
-    finally:
-        driver.close()
+    
+    await asyncio.to_thread(create_document_node)
     
     return UploadResponse(
         document_id=document_id,
@@ -487,7 +519,7 @@ async def upload_document(
 
 
 @app.post("/process", response_model=ProcessResponse)
-async def process_document(
+def process_document(
     request: ProcessRequest,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -509,37 +541,34 @@ async def process_document(
     
     driver = get_neo4j_driver()
     database = get_neo4j_database()
-    try:
-        with driver.session(database=database) as session:
-            # Verificar se documento existe
-            logging.info(f"Buscando documento no banco: {database}, ID: {request.document_id}")
-            result = session.run("""
-                MATCH (d:Document {id: $document_id})
-                RETURN d.status as status, d.filePath as filePath
-            """, document_id=request.document_id)
-            
-            record = result.single()
-            if not record:
-                logging.error(f"Documento não encontrado: {request.document_id}")
-                raise HTTPException(status_code=404, detail="Documento não encontrado")
-            
-            current_status = record["status"]
-            file_path = record["filePath"]
-            
-            if current_status == "Processing":
-                raise HTTPException(status_code=400, detail="Documento já está sendo processado")
-            
-            # Atualizar status para Processing
-            session.run("""
-                MATCH (d:Document {id: $document_id})
-                SET d.status = 'Processing',
-                    d.processingProgress = 0,
-                    d.processingModel = $model,
-                    d.processingError = null,
-                    d.updatedAt = datetime()
-            """, document_id=request.document_id, model=request.model)
-    finally:
-        driver.close()
+    with driver.session(database=database) as session:
+        # Verificar se documento existe
+        logging.info(f"Buscando documento no banco: {database}, ID: {request.document_id}")
+        result = session.run("""
+            MATCH (d:Document {id: $document_id})
+            RETURN d.status as status, d.filePath as filePath
+        """, document_id=request.document_id)
+        
+        record = result.single()
+        if not record:
+            logging.error(f"Documento não encontrado: {request.document_id}")
+            raise HTTPException(status_code=404, detail="Documento não encontrado")
+        
+        current_status = record["status"]
+        file_path = record["filePath"]
+        
+        if current_status == "Processing":
+            raise HTTPException(status_code=400, detail="Documento já está sendo processado")
+        
+        # Atualizar status para Processing
+        session.run("""
+            MATCH (d:Document {id: $document_id})
+            SET d.status = 'Processing',
+                d.processingProgress = 0,
+                d.processingModel = $model,
+                d.processingError = null,
+                d.updatedAt = datetime()
+        """, document_id=request.document_id, model=request.model)
     
     # Iniciar processamento em background via Celery
     from extraction_prompts import get_prompt
@@ -555,7 +584,7 @@ async def process_document(
 
 
 @app.post("/cancel/{document_id}")
-async def cancel_processing(
+def cancel_processing(
     document_id: str,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -565,201 +594,298 @@ async def cancel_processing(
     driver = get_neo4j_driver()
     database = get_neo4j_database()
     
-    try:
-        with driver.session(database=database) as session:
-            result = session.run("""
-                MATCH (d:Document {id: $document_id})
-                SET d.status = 'Pending', d.progress = 0, d.error = 'Cancelado pelo usuário'
-                RETURN d.filename as filename
-            """, document_id=document_id)
-            
-            record = result.single()
-            if not record:
-                raise HTTPException(status_code=404, detail="Documento não encontrado")
-            
-            return {
-                "message": f"Processamento cancelado para '{record['filename']}'",
-                "document_id": document_id,
-                "status": "Pending"
-            }
-    finally:
-        driver.close()
+    with driver.session(database=database) as session:
+        result = session.run("""
+            MATCH (d:Document {id: $document_id})
+            SET d.status = 'Pending', d.progress = 0, d.error = 'Cancelado pelo usuário'
+            RETURN d.filename as filename
+        """, document_id=document_id)
+        
+        record = result.single()
+        if not record:
+            raise HTTPException(status_code=404, detail="Documento não encontrado")
+        
+        return {
+            "message": f"Processamento cancelado para '{record['filename']}'",
+            "document_id": document_id,
+            "status": "Pending"
+        }
+
+def _read_status(session, document_id: str) -> Optional[StatusResponse]:
+    """Lê o status de processamento do documento (None se não existir)"""
+    result = session.run("""
+        MATCH (d:Document {id: $document_id})
+        RETURN d.fileName as filename,
+               d.status as status,
+               d.processingProgress as progress,
+               d.processingModel as model,
+               d.total_chunks as chunks,
+               d.entityNodeCount as entities,
+               d.entityEntityRelCount as relationships,
+               d.processingError as error,
+               toString(d.createdAt) as created_at,
+               toString(d.updatedAt) as updated_at
+    """, document_id=document_id)
+    
+    record = result.single()
+    if not record:
+        return None
+    
+    return StatusResponse(
+        document_id=document_id,
+        filename=record["filename"],
+        status=record["status"],
+        progress=record["progress"] or 0,
+        model=record["model"],
+        chunks=record["chunks"],
+        entities=record["entities"],
+        relationships=record["relationships"],
+        error=record["error"],
+        created_at=record["created_at"],
+        updated_at=record["updated_at"]
+    )
+
+
+def make_etag(payload) -> str:
+    """ETag forte a partir do corpo serializado da resposta (str ou bytes)"""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return '"' + hashlib.blake2b(payload, digest_size=16).hexdigest() + '"'
+
 
 @app.get("/status/{document_id}", response_model=StatusResponse)
-async def get_status(
+def get_status(
     document_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Retorna status atual do processamento do documento.
+    Suporta GET condicional: envie o ETag em If-None-Match para receber 304 se nada mudou.
     """
     driver = get_neo4j_driver()
-    try:
-        with driver.session(database=get_neo4j_database()) as session:
-            result = session.run("""
-                MATCH (d:Document {id: $document_id})
-                RETURN d.fileName as filename,
-                       d.status as status,
-                       d.processingProgress as progress,
-                       d.processingModel as model,
-                       d.total_chunks as chunks,
-                       d.entityNodeCount as entities,
-                       d.entityEntityRelCount as relationships,
-                       d.processingError as error,
-                       toString(d.createdAt) as created_at,
-                       toString(d.updatedAt) as updated_at
-            """, document_id=document_id)
-            
-            record = result.single()
-            if not record:
-                raise HTTPException(status_code=404, detail="Documento não encontrado")
-            
-            return StatusResponse(
-                document_id=document_id,
-                filename=record["filename"],
-                status=record["status"],
-                progress=record["progress"] or 0,
-                model=record["model"],
-                chunks=record["chunks"],
-                entities=record["entities"],
-                relationships=record["relationships"],
-                error=record["error"],
-                created_at=record["created_at"],
-                updated_at=record["updated_at"]
-            )
-    finally:
-        driver.close()
+    with driver.session(database=get_neo4j_database()) as session:
+        status = _read_status(session, document_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Documento não encontrado")
+    
+    etag = make_etag(status.model_dump_json())
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    return status
+
+
+# Intervalo entre leituras do status no stream SSE e duração máxima do stream
+STATUS_STREAM_INTERVAL = float(os.getenv("STATUS_STREAM_INTERVAL", "1"))
+STATUS_STREAM_TIMEOUT = float(os.getenv("STATUS_STREAM_TIMEOUT", "3600"))
+
+
+@app.get("/status/{document_id}/stream")
+async def stream_status(
+    document_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Stream (Server-Sent Events) do status de processamento.
+    Envia um evento a cada mudança e encerra quando o documento sai de 'Processing'.
+    """
+    driver = get_neo4j_driver()
+    database = get_neo4j_database()
+    
+    def read_status():
+        with driver.session(database=database) as session:
+            return _read_status(session, document_id)
+    
+    first = await asyncio.to_thread(read_status)
+    if first is None:
+        raise HTTPException(status_code=404, detail="Documento não encontrado")
+    
+    async def events():
+        status = first
+        last_payload = None
+        deadline = time.monotonic() + STATUS_STREAM_TIMEOUT
+        while True:
+            payload = status.model_dump_json()
+            if payload != last_payload:
+                yield f"data: {payload}\n\n"
+                last_payload = payload
+            if status.status != "Processing" or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(STATUS_STREAM_INTERVAL)
+            status = await asyncio.to_thread(read_status)
+            if status is None:
+                break
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 from auth import get_accessible_document_ids
 
-@app.get("/documents")
-async def list_documents(current_user: User = Depends(get_current_active_user)):
+# Campos aceitos em ?sort= (prefixo '-' para ordem decrescente)
+# Campos de ordenação aceitos em /documents e a expressão Cypher de cada um
+DOCUMENT_SORT_FIELDS = {
+    "created_at": "d.createdAt",
+    "filename": "toLower(d.fileName)",
+    "status": "d.status",
+    "progress": "coalesce(d.processingProgress, 0)",
+}
+
+
+def fetch_documents(
+    current_user: User,
+    status: Optional[List[str]] = None,
+    q: Optional[str] = None,
+    sort: str = "-created_at",
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> Dict[str, Any]:
     """
     Lista documentos que o usuário tem acesso.
     - Documentos que é dono
     - Documentos compartilhados diretamente
     - Documentos compartilhados via grupo
     - Admin vê todos
+    
+    Filtros opcionais: status (repetível), q (busca no nome do arquivo),
+    sort (created_at, filename, status, progress; '-' para decrescente), limit e offset.
+    Filtro, ordenação e paginação rodam no Neo4j; total vem de um count() separado.
     """
+    sort_field = sort.lstrip("-")
+    if sort_field not in DOCUMENT_SORT_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"sort inválido. Use: {', '.join(sorted(DOCUMENT_SORT_FIELDS))}"
+        )
+    
     driver = get_neo4j_driver()
-    try:
-        is_admin = current_user.is_admin
+    is_admin = current_user.is_admin
+    
+    # Permissões do usuário sobre o documento (compartilhamento direto e via grupo)
+    if is_admin:
+        match = """
+            MATCH (d:Document)
+            WITH d, [] as permissions
+        """
+        filters = []
+    else:
+        match = """
+            MATCH (d:Document)
+            WITH d,
+                 [(d)-[r:SHARED_WITH]->(:User {id: $user_id}) | r.permission] +
+                 [(d)-[r:SHARED_WITH]->(:Group)<-[:MEMBER_OF]-(:User {id: $user_id}) | r.permission]
+                 as permissions
+        """
+        filters = ["(d.ownerId = $username OR size(permissions) > 0)"]
+    if status:
+        filters.append("d.status IN $statuses")
+    if q:
+        filters.append("toLower(d.fileName) CONTAINS $search")
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+    
+    direction = "DESC" if sort.startswith("-") else "ASC"
+    page = "SKIP $offset" + (" LIMIT $limit" if limit is not None else "")
+    params = {
+        "username": current_user.username,
+        "user_id": current_user.id,
+        "statuses": status,
+        "search": q.lower() if q else None,
+        "offset": offset,
+        "limit": limit,
+    }
+    
+    with driver.session(database=get_neo4j_database()) as session:
+        total = session.run(f"""
+            {match}
+            {where}
+            RETURN count(d) as total
+        """, **params).single()["total"]
         
-        with driver.session(database=get_neo4j_database()) as session:
-            if is_admin:
-                # Admin vê todos os documentos
-                result = session.run("""
-                    MATCH (d:Document)
-                    RETURN d.id as id,
-                           d.fileName as filename,
-                           d.status as status,
-                           d.processingProgress as progress,
-                           d.processingModel as model,
-                           d.total_chunks as chunks,
-                           d.entityNodeCount as entities,
-                           d.entityEntityRelCount as relationships,
-                           d.processingError as error,
-                           d.ownerId as owner_id,
-                           toString(d.createdAt) as created_at
-                    ORDER BY d.createdAt DESC
-                """)
-            else:
-                # Usuário normal vê apenas documentos que tem acesso
-                result = session.run("""
-                    // Documentos que o usuário é dono
-                    MATCH (d:Document)
-                    WHERE d.ownerId = $username
-                    RETURN d.id as id,
-                           d.fileName as filename,
-                           d.status as status,
-                           d.processingProgress as progress,
-                           d.processingModel as model,
-                           d.total_chunks as chunks,
-                           d.entityNodeCount as entities,
-                           d.entityEntityRelCount as relationships,
-                           d.processingError as error,
-                           d.ownerId as owner_id,
-                           toString(d.createdAt) as created_at,
-                           'owner' as access_type
-                    
-                    UNION
-                    
-                    // Documentos compartilhados diretamente
-                    MATCH (d:Document)-[r:SHARED_WITH]->(u:User {id: $user_id})
-                    RETURN d.id as id,
-                           d.fileName as filename,
-                           d.status as status,
-                           d.processingProgress as progress,
-                           d.processingModel as model,
-                           d.total_chunks as chunks,
-                           d.entityNodeCount as entities,
-                           d.entityEntityRelCount as relationships,
-                           d.processingError as error,
-                           d.ownerId as owner_id,
-                           toString(d.createdAt) as created_at,
-                           r.permission as access_type
-                    
-                    UNION
-                    
-                    // Documentos compartilhados via grupo
-                    MATCH (u:User {id: $user_id})-[:MEMBER_OF]->(g:Group)<-[r:SHARED_WITH]-(d:Document)
-                    RETURN DISTINCT d.id as id,
-                           d.fileName as filename,
-                           d.status as status,
-                           d.processingProgress as progress,
-                           d.processingModel as model,
-                           d.total_chunks as chunks,
-                           d.entityNodeCount as entities,
-                           d.entityEntityRelCount as relationships,
-                           d.processingError as error,
-                           d.ownerId as owner_id,
-                           toString(d.createdAt) as created_at,
-                           r.permission as access_type
-                """, username=current_user.username, user_id=current_user.id)
-            
-            documents = []
-            seen_ids = set()  # Evitar duplicatas
-            
-            for record in result:
-                doc_id = record["id"]
-                if doc_id in seen_ids:
-                    continue
-                seen_ids.add(doc_id)
-                
-                owner_id = record["owner_id"]
-                is_owner = owner_id == current_user.username
-                access_type = record.get("access_type", "owner") if not is_admin else "admin"
-                
-                # Permissões baseadas no tipo de acesso
-                can_download = is_admin or is_owner or access_type in ['owner', 'manage', 'read']
-                can_delete = is_admin or is_owner or access_type == 'manage'
-                can_share = is_admin or is_owner or access_type == 'manage'
-                
-                documents.append({
-                    "document_id": doc_id,
-                    "filename": record["filename"],
-                    "status": record["status"],
-                    "progress": record["progress"] or 0,
-                    "model": record["model"],
-                    "chunks": record["chunks"] or 0,
-                    "entities": record["entities"] or 0,
-                    "relationships": record["relationships"] or 0,
-                    "error": record["error"],
-                    "created_at": record["created_at"],
-                    "owner_id": owner_id,
-                    "access_type": access_type,
-                    "can_download": can_download,
-                    "can_delete": can_delete,
-                    "can_share": can_share
-                })
+        result = session.run(f"""
+            {match}
+            {where}
+            WITH d, permissions
+            ORDER BY {DOCUMENT_SORT_FIELDS[sort_field]} {direction}
+            {page}
+            RETURN d.id as id,
+                   d.fileName as filename,
+                   d.status as status,
+                   d.processingProgress as progress,
+                   d.processingModel as model,
+                   d.total_chunks as chunks,
+                   d.entityNodeCount as entities,
+                   d.entityEntityRelCount as relationships,
+                   d.processingError as error,
+                   d.ownerId as owner_id,
+                   toString(d.createdAt) as created_at,
+                   CASE
+                       WHEN d.ownerId = $username THEN 'owner'
+                       WHEN 'manage' IN permissions THEN 'manage'
+                       ELSE head(permissions)
+                   END as access_type
+        """, **params)
+        
+        documents = []
+        for record in result:
+            owner_id = record["owner_id"]
+            is_owner = owner_id == current_user.username
+            access_type = record["access_type"] if not is_admin else "admin"
             
-            # Ordenar por data de criação (mais recente primeiro)
-            documents.sort(key=lambda x: x["created_at"] or "", reverse=True)
+            # Permissões baseadas no tipo de acesso
+            can_download = is_admin or is_owner or access_type in ['owner', 'manage', 'read']
+            can_delete = is_admin or is_owner or access_type == 'manage'
+            can_share = is_admin or is_owner or access_type == 'manage'
             
-            return {"documents": documents, "total": len(documents)}
-    finally:
-        driver.close()
+            documents.append({
+                "document_id": record["id"],
+                "filename": record["filename"],
+                "status": record["status"],
+                "progress": record["progress"] or 0,
+                "model": record["model"],
+                "chunks": record["chunks"] or 0,
+                "entities": record["entities"] or 0,
+                "relationships": record["relationships"] or 0,
+                "error": record["error"],
+                "created_at": record["created_at"],
+                "owner_id": owner_id,
+                "access_type": access_type,
+                "can_download": can_download,
+                "can_delete": can_delete,
+                "can_share": can_share
+            })
+        
+        return {"documents": documents, "total": total}
+
+
+@app.get("/documents")
+def list_documents(
+    response: Response,
+    status: Optional[List[str]] = Query(None),
+    q: Optional[str] = None,
+    sort: str = "-created_at",
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Lista documentos que o usuário tem acesso (ver fetch_documents para os filtros).
+    Suporta GET condicional: envie o ETag em If-None-Match para receber 304 se a lista não mudou.
+    """
+    result = fetch_documents(current_user, status, q, sort, limit, offset)
+    
+    etag = make_etag(orjson.dumps(result))
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    return result
 
 
 def query_graph(query: str, document_id: str, driver, database: str, top_k: int = 5) -> List[Dict]:
@@ -818,34 +944,211 @@ def query_graph(query: str, document_id: str, driver, database: str, top_k: int
         return sources
 
 
-def query_hybrid(query: str, document_id: str, driver, database: str, vector_store, top_k: int = 5) -> tuple:
+# Vector stores do processo, um por database (construídos uma vez, como o driver)
+_vector_stores: Dict[str, CustomNeo4jVectorStore] = {}
+_vector_stores_lock = threading.Lock()
+
+
+def _get_vector_store(driver, database: str) -> CustomNeo4jVectorStore:
+    """
+    Vector store de chunks usando o driver compartilhado (mesma dimensão do processamento).
+    O índice é criado pelo worker; aqui só se lê a configuração dele, uma vez por processo.
+    """
+    store = _vector_stores.get(database)
+    if store is not None:
+        return store
+    with _vector_stores_lock:
+        store = _vector_stores.get(database)
+        if store is None:
+            force_openai = os.getenv("FORCE_OPENAI_EMBEDDINGS", "").lower() == "true"
+            embedding_dim = 1536 if force_openai else int(os.getenv("LOCAL_EMBEDDING_DIMENSION", "384"))
+            store = CustomNeo4jVectorStore(
+                username=os.getenv("NEO4J_USER"),
+                password=os.getenv("NEO4J_PASSWORD"),
+                url=os.getenv("NEO4J_URI"),
+                embedding_dimension=embedding_dim,
+                database=database,
+                driver=driver,
+                create_index=False
+            )
+            _vector_stores[database] = store
+        return store
+
+
+def semantic_sources(response) -> List[Dict]:
+    """Converte os source_nodes de uma resposta do LlamaIndex em fontes da API"""
+    sources = []
+    for node in getattr(response, 'source_nodes', None) or []:
+        text = node.text
+        sources.append({
+            "text": text[:500] + "..." if len(text) > 500 else text,
+            "score": getattr(node, 'score', None),
+            "metadata": {**node.metadata, "search_type": "semantic"}
+        })
+    return sources
+
+
+def query_llm(model: str):
+    """
+    LLM do LlamaIndex para a resposta da busca semântica.
+    Passado explicitamente ao query engine: Settings.llm é global ao processo e
+    as requisições rodam em paralelo no threadpool.
+    """
+    # Import tardio: clientes de LLM só são carregados na primeira consulta
+    if model == "claude":
+        from llama_index.llms.anthropic import Anthropic
+        return Anthropic(model="claude-sonnet-4-20250514")
+    from llama_index.llms.openai import OpenAI as LlamaOpenAI
+    return LlamaOpenAI(model="gpt-4o")
+
+
+def query_hybrid(query: str, document_id: str, driver, database: str, vector_store, llm, top_k: int = 5) -> tuple:
     """Busca híbrida - combina semântica + grafo"""
     # Busca semântica
     from llama_index.core import VectorStoreIndex
     index = VectorStoreIndex.from_vector_store(vector_store=vector_store)
-    query_engine = index.as_query_engine(similarity_top_k=top_k)
+    query_engine = index.as_query_engine(llm=llm, similarity_top_k=top_k)
     semantic_response = query_engine.query(query)
     
-    semantic_sources = []
-    if hasattr(semantic_response, 'source_nodes'):
-        for node in semantic_response.source_nodes:
-            semantic_sources.append({
-                "text": node.text[:500] + "..." if len(node.text) > 500 else node.text,
-                "score": node.score if hasattr(node, 'score') else None,
-                "metadata": {**node.metadata, "search_type": "semantic"}
-            })
-    
     # Busca por grafo
     graph_sources = query_graph(query, document_id, driver, database, top_k)
     
     # Combinar resultados
-    all_sources = semantic_sources + graph_sources
+    all_sources = semantic_sources(semantic_response) + graph_sources
     
     return str(semantic_response), all_sources
 
 
+SEARCH_TYPES = ("semantic", "graph", "hybrid")
+SEARCH_TYPES_SET = frozenset(SEARCH_TYPES)
+
+# Cache LRU com TTL das respostas do /query (evita repetir busca + chamada ao LLM)
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+_query_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+# Endpoints síncronos rodam em paralelo no threadpool: todo acesso ao cache usa o lock
+_query_cache_lock = threading.Lock()
+
+
+def _query_cache_get(key: tuple) -> Optional["QueryResponse"]:
+    """Retorna a resposta cacheada se ainda estiver dentro do TTL"""
+    with _query_cache_lock:
+        entry = _query_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at >= QUERY_CACHE_TTL:
+            del _query_cache[key]
+            return None
+        _query_cache.move_to_end(key)
+        return response
+
+
+def _query_cache_put(key: tuple, response: "QueryResponse"):
+    """Guarda a resposta, descartando a entrada menos usada quando cheio"""
+    with _query_cache_lock:
+        _query_cache[key] = (time.monotonic(), response)
+        _query_cache.move_to_end(key)
+        while len(_query_cache) > QUERY_CACHE_MAX_ENTRIES:
+            _query_cache.popitem(last=False)
+
+
+# Consultas em andamento por chave (single-flight): requisições idênticas e simultâneas
+# aguardam a primeira em vez de repetir busca + LLM
+QUERY_INFLIGHT_TIMEOUT = float(os.getenv("QUERY_INFLIGHT_TIMEOUT", "120"))
+_query_inflight: Dict[tuple, threading.Event] = {}
+
+
+def _query_inflight_begin(key: tuple) -> Optional[threading.Event]:
+    """Marca a chave como em andamento. Retorna None se esta requisição executa a consulta,
+    ou o Event da requisição que já a executa"""
+    with _query_cache_lock:
+        event = _query_inflight.get(key)
+        if event is None:
+            _query_inflight[key] = threading.Event()
+        return event
+
+
+def _query_inflight_end(key: tuple):
+    """Libera as requisições que aguardam a chave (chamado após gravar no cache)"""
+    with _query_cache_lock:
+        event = _query_inflight.pop(key, None)
+    if event is not None:
+        event.set()
+
+
+def invalidate_query_cache():
+    """Descarta respostas cacheadas (chamado quando o conteúdo indexado muda)"""
+    with _query_cache_lock:
+        _query_cache.clear()
+
+
+def answer_query(request: "QueryRequest", driver, database: str, model_to_use: str) -> "QueryResponse":
+    """Executa a busca do tipo pedido e gera a resposta com o LLM (sem cache)"""
+    # Configurar LLM
+    llm = LLMProvider.get_llm(model_to_use)
+    
+    # Executar busca baseado no tipo
+    if request.search_type == "graph":
+        # Busca por grafo
+        sources = query_graph(request.query, request.document_id, driver, database, request.top_k)
+        
+        # Gerar resposta com LLM baseado nas entidades encontradas
+        context = "\n".join([
+            f"- {s['entity']} ({s['type']}): {s['description']}"
+            for s in sources
+        ])
+        
+        prompt = f"""Baseado nas seguintes entidades do grafo de conhecimento:
+
+{context}
+
+Responda a pergunta: {request.query}"""
+        
+        from langchain_core.messages import HumanMessage
+        response = llm.invoke([HumanMessage(content=prompt)])
+        answer = response.content if hasattr(response, 'content') else str(response)
+        
+    elif request.search_type == "hybrid":
+        # Busca híbrida
+        vector_store = _get_vector_store(driver, database)
+        
+        answer, sources = query_hybrid(
+            request.query, 
+            request.document_id, 
+            driver, 
+            database, 
+            vector_store, 
+            query_llm(model_to_use),
+            request.top_k
+        )
+        
+    else:  # semantic (padrão)
+        # Busca semântica
+        vector_store = _get_vector_store(driver, database)
+        
+        index = VectorStoreIndex.from_vector_store(vector_store=vector_store)
+        query_engine = index.as_query_engine(llm=query_llm(model_to_use), similarity_top_k=request.top_k)
+        response = query_engine.query(request.query)
+        
+        answer = str(response)
+        print(f"🔍 Busca semântica: '{request.query}'")
+        print(f"   Resposta: {answer[:200]}..." if len(answer) > 200 else f"   Resposta: {answer}")
+        if hasattr(response, 'source_nodes'):
+            print(f"   Fontes encontradas: {len(response.source_nodes)}")
+        else:
+            print("   Nenhuma fonte encontrada (source_nodes não existe)")
+        sources = semantic_sources(response)
+    
+    return QueryResponse(
+        answer=answer,
+        sources=sources,
+        model_used=model_to_use
+    )
+
+
 @app.post("/query", response_model=QueryResponse)
-async def query_documents(
+def query_documents(
     request: QueryRequest,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -857,125 +1160,87 @@ async def query_documents(
     - graph: Busca navegando entidades e relacionamentos
     - hybrid: Combina semantic + graph
     """
+    # Rejeita entradas inválidas antes de abrir conexão com o Neo4j ou chamar o LLM
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="A pergunta não pode ser vazia")
+    if request.search_type not in SEARCH_TYPES_SET:
+        raise HTTPException(
+            status_code=400,
+            detail=f"search_type inválido. Use: {', '.join(SEARCH_TYPES)}"
+        )
+    
     driver = get_neo4j_driver()
     database = get_neo4j_database()
     
-    try:
-        # Verificar se há documentos processados
-        with driver.session(database=database) as session:
-            if request.document_id:
-                result = session.run("""
-                    MATCH (d:Document {id: $document_id})
-                    WHERE d.status = 'Completed'
-                    RETURN d.processingModel as model
-                """, document_id=request.document_id)
-            else:
-                result = session.run("""
-                    MATCH (d:Document)
-                    WHERE d.status = 'Completed'
-                    RETURN d.processingModel as model
-                    LIMIT 1
-                """)
-            
-            record = result.single()
-            if not record:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Nenhum documento processado encontrado"
-                )
-            
-            # Usar modelo do documento, ou especificado, ou padrão do .env
-            default_model = os.getenv("DEFAULT_MODEL", "claude")
-            model_to_use = request.model or record["model"] or default_model
-        
-        # Configurar LLM
-        llm = LLMProvider.get_llm(model_to_use)
-        if model_to_use == "claude":
-            Settings.llm = Anthropic(model="claude-sonnet-4-20250514")
+    # Verificar se há documentos processados
+    # generation muda sempre que o conteúdo consultável muda (o worker atualiza
+    # updatedAt ao concluir); entra na chave do cache, válido entre processos.
+    # document_generation cobre só o documento; global_generation, todos os Completed
+    with driver.session(database=database) as session:
+        if request.document_id:
+            result = session.run("""
+                MATCH (d:Document {id: $document_id})
+                WHERE d.status = 'Completed'
+                CALL {
+                    MATCH (c:Document)
+                    WHERE c.status = 'Completed'
+                    RETURN max(c.updatedAt) as newest, count(c) as total
+                }
+                RETURN d.processingModel as model,
+                       toString(d.updatedAt) as document_generation,
+                       toString(newest) + '#' + toString(total) as global_generation
+            """, document_id=request.document_id)
         else:
-            Settings.llm = LlamaOpenAI(model="gpt-4o")
+            result = session.run("""
+                MATCH (d:Document)
+                WHERE d.status = 'Completed'
+                WITH d ORDER BY d.updatedAt DESC
+                WITH collect(d) as docs
+                WHERE size(docs) > 0
+                RETURN docs[0].processingModel as model,
+                       toString(docs[0].updatedAt) + '#' + toString(size(docs)) as global_generation,
+                       null as document_generation
+            """)
         
-        # Executar busca baseado no tipo
-        if request.search_type == "graph":
-            # Busca por grafo
-            sources = query_graph(request.query, request.document_id, driver, database, request.top_k)
-            
-            # Gerar resposta com LLM baseado nas entidades encontradas
-            context = "\n".join([
-                f"- {s['entity']} ({s['type']}): {s['description']}"
-                for s in sources
-            ])
-            
-            prompt = f"""Baseado nas seguintes entidades do grafo de conhecimento:
-
-{context}
-
-Responda a pergunta: {request.query}"""
-            
-            from langchain_core.messages import HumanMessage
-            response = llm.invoke([HumanMessage(content=prompt)])
-            answer = response.content if hasattr(response, 'content') else str(response)
-            
-        elif request.search_type == "hybrid":
-            # Busca híbrida - usar mesma lógica de dimensão do processamento
-            force_openai = os.getenv("FORCE_OPENAI_EMBEDDINGS", "").lower() == "true"
-            embedding_dim = 1536 if force_openai else int(os.getenv("LOCAL_EMBEDDING_DIMENSION", "384"))
-            vector_store = CustomNeo4jVectorStore(
-                username=os.getenv("NEO4J_USER"),
-                password=os.getenv("NEO4J_PASSWORD"),
-                url=os.getenv("NEO4J_URI"),
-                embedding_dimension=embedding_dim,
-                database=database
-            )
-            
-            answer, sources = query_hybrid(
-                request.query, 
-                request.document_id, 
-                driver, 
-                database, 
-                vector_store, 
-                request.top_k
-            )
-            
-        else:  # semantic (padrão)
-            # Busca semântica - usar mesma lógica de dimensão do processamento
-            force_openai = os.getenv("FORCE_OPENAI_EMBEDDINGS", "").lower() == "true"
-            embedding_dim = 1536 if force_openai else int(os.getenv("LOCAL_EMBEDDING_DIMENSION", "384"))
-            vector_store = CustomNeo4jVectorStore(
-                username=os.getenv("NEO4J_USER"),
-                password=os.getenv("NEO4J_PASSWORD"),
-                url=os.getenv("NEO4J_URI"),
-                embedding_dimension=embedding_dim,
-                database=database
+        record = result.single()
+        if not record:
+            raise HTTPException(
+                status_code=400,
+                detail="Nenhum documento processado encontrado"
             )
-            
-            index = VectorStoreIndex.from_vector_store(vector_store=vector_store)
-            query_engine = index.as_query_engine(similarity_top_k=request.top_k)
-            response = query_engine.query(request.query)
-            
-            answer = str(response)
-            sources = []
-            print(f"🔍 Busca semântica: '{request.query}'")
-            print(f"   Resposta: {answer[:200]}..." if len(answer) > 200 else f"   Resposta: {answer}")
-            if hasattr(response, 'source_nodes'):
-                print(f"   Fontes encontradas: {len(response.source_nodes)}")
-                for node in response.source_nodes:
-                    sources.append({
-                        "text": node.text[:500] + "..." if len(node.text) > 500 else node.text,
-                        "score": node.score if hasattr(node, 'score') else None,
-                        "metadata": {**node.metadata, "search_type": "semantic"}
-                    })
-            else:
-                print("   Nenhuma fonte encontrada (source_nodes não existe)")
-        
-        return QueryResponse(
-            answer=answer,
-            sources=sources,
-            model_used=model_to_use
-        )
         
+        # Usar modelo do documento, ou especificado, ou padrão do .env
+        default_model = os.getenv("DEFAULT_MODEL", "claude")
+        model_to_use = request.model or record["model"] or default_model
+    
+    # Só a busca por grafo filtra por documento; a vetorial consulta o índice inteiro
+    if request.search_type == "graph" and request.document_id:
+        generation = record["document_generation"]
+    else:
+        generation = record["global_generation"]
+    cache_key = (request.query, request.document_id, request.top_k, request.search_type, model_to_use,
+                 generation)
+    cached = _query_cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Consulta idêntica já em andamento em outra thread: aguarda e reaproveita o resultado
+    leader_event = _query_inflight_begin(cache_key)
+    if leader_event is not None:
+        leader_event.wait(QUERY_INFLIGHT_TIMEOUT)
+        cached = _query_cache_get(cache_key)
+        if cached is not None:
+            return cached
+        # A consulta líder falhou ou excedeu o tempo: segue com a própria
+    
+    try:
+        query_response = answer_query(request, driver, database, model_to_use)
+        _query_cache_put(cache_key, query_response)
     finally:
-        driver.close()
+        if leader_event is None:
+            _query_inflight_end(cache_key)
+    return query_response
+    
 
 
 class ChatRequest(BaseModel):
@@ -991,7 +1256,7 @@ class ChatResponse(BaseModel):
 
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_with_document(
+def chat_with_document(
     request: ChatRequest,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -1003,63 +1268,62 @@ async def chat_with_document(
     driver = get_neo4j_driver()
     database = get_neo4j_database()
     
-    try:
-        with driver.session(database=database) as session:
-            # Buscar modelo do documento
-            doc_result = session.run("""
-                MATCH (d:Document {id: $document_id})
-                WHERE d.status = 'Completed'
-                RETURN d.processingModel as model, d.filename as filename
-            """, document_id=request.document_id)
-            
-            doc_record = doc_result.single()
-            if not doc_record:
-                raise HTTPException(
-                    status_code=404,
-                    detail="Documento não encontrado ou não processado"
-                )
-            
-            default_model = os.getenv("DEFAULT_MODEL", "claude")
-            model_to_use = doc_record["model"] or default_model
-            filename = doc_record["filename"]
-            
-            # Buscar chunks relevantes do documento (busca por palavras-chave)
-            keywords = [word.lower() for word in request.message.split() if len(word) > 2]
-            
-            chunks_result = session.run("""
-                MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)
-                WHERE any(keyword IN $keywords WHERE toLower(c.text) CONTAINS keyword)
-                RETURN c.text as text, c.position as position
-                ORDER BY c.position
-                LIMIT $top_k
-            """, document_id=request.document_id, keywords=keywords, top_k=request.top_k)
-            
-            chunks = [record["text"] for record in chunks_result]
-            
-            # Se não encontrou por keywords, pegar primeiros chunks
-            if not chunks:
-                chunks_result = session.run("""
-                    MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)
-                    RETURN c.text as text
-                    ORDER BY c.position
-                    LIMIT $top_k
-                """, document_id=request.document_id, top_k=request.top_k)
-                chunks = [record["text"] for record in chunks_result]
+    with driver.session(database=database) as session:
+        # Buscar modelo do documento
+        doc_result = session.run("""
+            MATCH (d:Document {id: $document_id})
+            WHERE d.status = 'Completed'
+            RETURN d.processingModel as model, d.filename as filename
+        """, document_id=request.document_id)
         
-        if not chunks:
-            return ChatResponse(
-                response="Não encontrei conteúdo no documento para responder.",
-                model_used=model_to_use,
-                sources=[]
+        doc_record = doc_result.single()
+        if not doc_record:
+            raise HTTPException(
+                status_code=404,
+                detail="Documento não encontrado ou não processado"
             )
         
-        # Construir contexto
-        context = "\n\n".join(chunks)
+        default_model = os.getenv("DEFAULT_MODEL", "claude")
+        model_to_use = doc_record["model"] or default_model
+        filename = doc_record["filename"]
+        
+        # Buscar chunks relevantes do documento (busca por palavras-chave)
+        keywords = [word.lower() for word in request.message.split() if len(word) > 2]
+        
+        chunks_result = session.run("""
+            MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)
+            WHERE any(keyword IN $keywords WHERE toLower(c.text) CONTAINS keyword)
+            RETURN c.text as text, c.position as position
+            ORDER BY c.position
+            LIMIT $top_k
+        """, document_id=request.document_id, keywords=keywords, top_k=request.top_k)
         
-        # Gerar resposta com o LLM do documento
-        llm = LLMProvider.get_llm(model_to_use)
+        chunks = [record["text"] for record in chunks_result]
         
-        prompt = f"""Você é um assistente especializado em responder perguntas sobre o documento "{filename}".
+        # Se não encontrou por keywords, pegar primeiros chunks
+        if not chunks:
+            chunks_result = session.run("""
+                MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)
+                RETURN c.text as text
+                ORDER BY c.position
+                LIMIT $top_k
+            """, document_id=request.document_id, top_k=request.top_k)
+            chunks = [record["text"] for record in chunks_result]
+    
+    if not chunks:
+        return ChatResponse(
+            response="Não encontrei conteúdo no documento para responder.",
+            model_used=model_to_use,
+            sources=[]
+        )
+    
+    # Construir contexto
+    context = "\n\n".join(chunks)
+    
+    # Gerar resposta com o LLM do documento
+    llm = LLMProvider.get_llm(model_to_use)
+    
+    prompt = f"""Você é um assistente especializado em responder perguntas sobre o documento "{filename}".
 
 Baseado no seguinte contexto do documento:
 
@@ -1071,25 +1335,23 @@ Pergunta: {request.message}
 
 Resposta:"""
 
-        from langchain_core.messages import HumanMessage
-        response = llm.invoke([HumanMessage(content=prompt)])
-        answer = response.content if hasattr(response, 'content') else str(response)
-        
-        print(f"💬 Chat IA: '{request.message[:50]}...' -> {model_to_use}")
-        print(f"   Contexto: {len(chunks)} chunks")
-        print(f"   Resposta: {answer[:100]}...")
-        
-        return ChatResponse(
-            response=answer,
-            model_used=model_to_use,
-            sources=[{"text": c[:200] + "..." if len(c) > 200 else c} for c in chunks[:3]]
-        )
-        
-    finally:
-        driver.close()
+    from langchain_core.messages import HumanMessage
+    response = llm.invoke([HumanMessage(content=prompt)])
+    answer = response.content if hasattr(response, 'content') else str(response)
+    
+    print(f"💬 Chat IA: '{request.message[:50]}...' -> {model_to_use}")
+    print(f"   Contexto: {len(chunks)} chunks")
+    print(f"   Resposta: {answer[:100]}...")
+    
+    return ChatResponse(
+        response=answer,
+        model_used=model_to_use,
+        sources=[{"text": c[:200] + "..." if len(c) > 200 else c} for c in chunks[:3]]
+    )
+    
 
 @app.delete("/documents/{document_id}")
-async def delete_document(
+def delete_document(
     document_id: str,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -1098,50 +1360,49 @@ async def delete_document(
     Apenas o dono do documento ou administradores podem excluir.
     """
     driver = get_neo4j_driver()
-    try:
-        with driver.session(database=get_neo4j_database()) as session:
-            # Verificar se existe e obter ownerId
-            result = session.run("""
-                MATCH (d:Document {id: $document_id})
-                RETURN d.filePath as filePath, d.ownerId as ownerId
-            """, document_id=document_id)
-            
-            record = result.single()
-            if not record:
-                raise HTTPException(status_code=404, detail="Documento não encontrado")
-            
-            # Verificar permissão: dono ou admin
-            owner_id = record["ownerId"]
-            is_owner = owner_id == current_user.username
-            is_admin = getattr(current_user, 'is_admin', False) or current_user.username == "admin"
-            
-            if not is_owner and not is_admin:
-                raise HTTPException(
-                    status_code=403, 
-                    detail="Acesso negado. Apenas o dono do documento ou administradores podem excluir."
-                )
-            
-            file_path = record["filePath"]
-            
-            # Deletar arquivo
-            if file_path and Path(file_path).exists():
-                Path(file_path).unlink()
-            
-            # Deletar do Neo4j (Document, Chunks, Entities relacionadas)
-            session.run("""
-                MATCH (d:Document {id: $document_id})
-                OPTIONAL MATCH (d)-[:FIRST_CHUNK]->(c:Chunk)
-                OPTIONAL MATCH (c)-[:HAS_ENTITY]->(e:__Entity__)
-                DETACH DELETE d, c
-            """, document_id=document_id)
-            
-            return {"message": "Documento excluído com sucesso", "document_id": document_id}
-    finally:
-        driver.close()
+    with driver.session(database=get_neo4j_database()) as session:
+        # Verificar se existe e obter ownerId
+        result = session.run("""
+            MATCH (d:Document {id: $document_id})
+            RETURN d.filePath as filePath, d.ownerId as ownerId
+        """, document_id=document_id)
+        
+        record = result.single()
+        if not record:
+            raise HTTPException(status_code=404, detail="Documento não encontrado")
+        
+        # Verificar permissão: dono ou admin
+        owner_id = record["ownerId"]
+        is_owner = owner_id == current_user.username
+        is_admin = getattr(current_user, 'is_admin', False) or current_user.username == "admin"
+        
+        if not is_owner and not is_admin:
+            raise HTTPException(
+                status_code=403, 
+                detail="Acesso negado. Apenas o dono do documento ou administradores podem excluir."
+            )
+        
+        file_path = record["filePath"]
+        
+        # Deletar arquivo (e o texto extraído dele no cache compartilhado com o worker)
+        if file_path and Path(file_path).exists():
+            FileProcessor.evict_cached_extract(file_path)
+            Path(file_path).unlink()
+        
+        # Deletar do Neo4j (Document, Chunks, Entities relacionadas)
+        session.run("""
+            MATCH (d:Document {id: $document_id})
+            OPTIONAL MATCH (d)-[:FIRST_CHUNK]->(c:Chunk)
+            OPTIONAL MATCH (c)-[:HAS_ENTITY]->(e:__Entity__)
+            DETACH DELETE d, c
+        """, document_id=document_id)
+        invalidate_query_cache()
+        
+        return {"message": "Documento excluído com sucesso", "document_id": document_id}
 
 
 @app.get("/documents/{document_id}/chunks")
-async def get_document_chunks(
+def get_document_chunks(
     document_id: str,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -1151,29 +1412,26 @@ async def get_document_chunks(
     driver = get_neo4j_driver()
     database = get_neo4j_database()
     
-    try:
-        with driver.session(database=database) as session:
-            result = session.run("""
-                MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)
-                RETURN c.id as id, c.text as text, c.position as position
-                ORDER BY c.position
-            """, document_id=document_id)
-            
-            chunks = []
-            for record in result:
-                chunks.append({
-                    "id": record["id"],
-                    "text": record["text"],
-                    "position": record["position"]
-                })
-            
-            return {"chunks": chunks, "total": len(chunks)}
-    finally:
-        driver.close()
+    with driver.session(database=database) as session:
+        result = session.run("""
+            MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)
+            RETURN c.id as id, c.text as text, c.position as position
+            ORDER BY c.position
+        """, document_id=document_id)
+        
+        chunks = []
+        for record in result:
+            chunks.append({
+                "id": record["id"],
+                "text": record["text"],
+                "position": record["position"]
+            })
+        
+        return {"chunks": chunks, "total": len(chunks)}
 
 
 @app.get("/documents/{document_id}/download")
-async def download_document(
+def download_document(
     document_id: str,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -1186,45 +1444,42 @@ async def download_document(
     driver = get_neo4j_driver()
     database = get_neo4j_database()
     
-    try:
-        with driver.session(database=database) as session:
-            result = session.run("""
-                MATCH (d:Document {id: $document_id})
-                RETURN d.filePath as filePath, d.fileName as fileName, d.ownerId as ownerId
-            """, document_id=document_id)
-            
-            record = result.single()
-            if not record:
-                raise HTTPException(status_code=404, detail="Documento não encontrado")
-            
-            file_path = record["filePath"]
-            file_name = record["fileName"]
-            owner_id = record["ownerId"]
-            
-            # Verificar permissão: dono ou admin
-            is_owner = owner_id == current_user.username
-            is_admin = getattr(current_user, 'is_admin', False) or current_user.username == "admin"
-            
-            if not is_owner and not is_admin:
-                raise HTTPException(
-                    status_code=403, 
-                    detail="Acesso negado. Apenas o dono do documento ou administradores podem baixar."
-                )
-            
-            # Verificar se arquivo existe
-            if not os.path.exists(file_path):
-                raise HTTPException(status_code=404, detail="Arquivo não encontrado no servidor")
-            
-            return FileResponse(
-                path=file_path,
-                filename=file_name,
-                media_type="application/octet-stream"
+    with driver.session(database=database) as session:
+        result = session.run("""
+            MATCH (d:Document {id: $document_id})
+            RETURN d.filePath as filePath, d.fileName as fileName, d.ownerId as ownerId
+        """, document_id=document_id)
+        
+        record = result.single()
+        if not record:
+            raise HTTPException(status_code=404, detail="Documento não encontrado")
+        
+        file_path = record["filePath"]
+        file_name = record["fileName"]
+        owner_id = record["ownerId"]
+        
+        # Verificar permissão: dono ou admin
+        is_owner = owner_id == current_user.username
+        is_admin = getattr(current_user, 'is_admin', False) or current_user.username == "admin"
+        
+        if not is_owner and not is_admin:
+            raise HTTPException(
+                status_code=403, 
+                detail="Acesso negado. Apenas o dono do documento ou administradores podem baixar."
             )
-    finally:
-        driver.close()
+        
+        # Verificar se arquivo existe
+        if not os.path.exists(file_path):
+            raise HTTPException(status_code=404, detail="Arquivo não encontrado no servidor")
+        
+        return FileResponse(
+            path=file_path,
+            filename=file_name,
+            media_type="application/octet-stream"
+        )
 
 @app.get("/documents/{document_id}/graph")
-async def get_document_graph(
+def get_document_graph(
     document_id: str,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -1235,77 +1490,74 @@ async def get_document_graph(
     driver = get_neo4j_driver()
     database = get_neo4j_database()
     
-    try:
-        with driver.session(database=database) as session:
-            # Verificar se documento existe
-            doc_result = session.run("""
-                MATCH (d:Document {id: $document_id})
-                RETURN d.fileName as filename, d.status as status
-            """, document_id=document_id)
-            doc = doc_result.single()
-            
-            if not doc:
-                raise HTTPException(status_code=404, detail="Documento não encontrado")
-            
-            if doc["status"] != "Completed":
-                raise HTTPException(status_code=400, detail="Documento ainda não foi processado")
-            
-            # Buscar entidades conectadas ao documento via chunks
-            entities_result = session.run("""
-                MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)-[:HAS_ENTITY]->(e:__Entity__)
-                WITH DISTINCT e
-                RETURN e.id as id, labels(e) as labels, e.description as description
-                ORDER BY e.id
+    with driver.session(database=database) as session:
+        # Verificar se documento existe
+        doc_result = session.run("""
+            MATCH (d:Document {id: $document_id})
+            RETURN d.fileName as filename, d.status as status
+        """, document_id=document_id)
+        doc = doc_result.single()
+        
+        if not doc:
+            raise HTTPException(status_code=404, detail="Documento não encontrado")
+        
+        if doc["status"] != "Completed":
+            raise HTTPException(status_code=400, detail="Documento ainda não foi processado")
+        
+        # Buscar entidades conectadas ao documento via chunks
+        entities_result = session.run("""
+            MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)-[:HAS_ENTITY]->(e:__Entity__)
+            WITH DISTINCT e
+            RETURN e.id as id, labels(e) as labels, e.description as description
+            ORDER BY e.id
+            LIMIT 500
+        """, document_id=document_id)
+        
+        entities = []
+        entity_ids = set()
+        for record in entities_result:
+            entity_id = record["id"]
+            entity_ids.add(entity_id)
+            # Pegar o primeiro label que não seja __Entity__
+            labels = [l for l in record["labels"] if l != "__Entity__"]
+            entity_type = labels[0] if labels else "Entity"
+            entities.append({
+                "id": entity_id,
+                "type": entity_type,
+                "description": record["description"] or ""
+            })
+        
+        # Buscar relacionamentos entre as entidades do documento
+        relationships = []
+        if entity_ids:
+            rels_result = session.run("""
+                MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)-[:HAS_ENTITY]->(source:__Entity__)
+                MATCH (source)-[r]->(target:__Entity__)
+                WHERE type(r) <> 'HAS_ENTITY' AND type(r) <> 'PART_OF'
+                WITH DISTINCT source, r, target
+                RETURN source.id as source, target.id as target, type(r) as type
                 LIMIT 500
             """, document_id=document_id)
             
-            entities = []
-            entity_ids = set()
-            for record in entities_result:
-                entity_id = record["id"]
-                entity_ids.add(entity_id)
-                # Pegar o primeiro label que não seja __Entity__
-                labels = [l for l in record["labels"] if l != "__Entity__"]
-                entity_type = labels[0] if labels else "Entity"
-                entities.append({
-                    "id": entity_id,
-                    "type": entity_type,
-                    "description": record["description"] or ""
+            for record in rels_result:
+                relationships.append({
+                    "source": record["source"],
+                    "target": record["target"],
+                    "type": record["type"]
                 })
-            
-            # Buscar relacionamentos entre as entidades do documento
-            relationships = []
-            if entity_ids:
-                rels_result = session.run("""
-                    MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)-[:HAS_ENTITY]->(source:__Entity__)
-                    MATCH (source)-[r]->(target:__Entity__)
-                    WHERE type(r) <> 'HAS_ENTITY' AND type(r) <> 'PART_OF'
-                    WITH DISTINCT source, r, target
-                    RETURN source.id as source, target.id as target, type(r) as type
-                    LIMIT 500
-                """, document_id=document_id)
-                
-                for record in rels_result:
-                    relationships.append({
-                        "source": record["source"],
-                        "target": record["target"],
-                        "type": record["type"]
-                    })
-            
-            return {
-                "document_id": document_id,
-                "filename": doc["filename"],
-                "entities": entities,
-                "relationships": relationships,
-                "total_entities": len(entities),
-                "total_relationships": len(relationships)
-            }
-    finally:
-        driver.close()
+        
+        return {
+            "document_id": document_id,
+            "filename": doc["filename"],
+            "entities": entities,
+            "relationships": relationships,
+            "total_entities": len(entities),
+            "total_relationships": len(relationships)
+        }
 
 
 @app.get("/documents/{document_id}/chunks")
-async def get_document_chunks(
+def get_document_chunks(
     document_id: str,
     current_user: User = Depends(get_current_active_user)
 ):
@@ -1315,72 +1567,95 @@ async def get_document_chunks(
     driver = get_neo4j_driver()
     database = get_neo4j_database()
     
-    try:
-        with driver.session(database=database) as session:
-            # Verificar se documento existe e pegar resumo
-            doc_result = session.run("""
-                MATCH (d:Document {id: $document_id})
-                RETURN d.fileName as filename, d.status as status, d.summary as summary
-            """, document_id=document_id)
-            doc = doc_result.single()
-            
-            if not doc:
-                raise HTTPException(status_code=404, detail="Documento não encontrado")
-            
-            # Buscar chunks do documento
-            chunks_result = session.run("""
-                MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)
-                RETURN c.id as id, c.text as text, c.chunkSeqId as seq_id
-                ORDER BY c.chunkSeqId
-            """, document_id=document_id)
-            
-            chunks = []
-            full_text = []
-            for record in chunks_result:
-                chunk_text = record["text"] or ""
-                chunks.append({
-                    "id": record["id"],
-                    "seq_id": record["seq_id"] or len(chunks),
-                    "text": chunk_text,
-                    "preview": chunk_text[:200] + "..." if len(chunk_text) > 200 else chunk_text
-                })
-                full_text.append(chunk_text)
-            
-            return {
-                "document_id": document_id,
-                "filename": doc["filename"],
-                "summary": doc["summary"] or "",
-                "chunks": chunks,
-                "total_chunks": len(chunks),
-                "full_text": "\n\n".join(full_text)
-            }
-    finally:
-        driver.close()
+    with driver.session(database=database) as session:
+        # Verificar se documento existe e pegar resumo
+        doc_result = session.run("""
+            MATCH (d:Document {id: $document_id})
+            RETURN d.fileName as filename, d.status as status, d.summary as summary
+        """, document_id=document_id)
+        doc = doc_result.single()
+        
+        if not doc:
+            raise HTTPException(status_code=404, detail="Documento não encontrado")
+        
+        # Buscar chunks do documento
+        chunks_result = session.run("""
+            MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)
+            RETURN c.id as id, c.text as text, c.chunkSeqId as seq_id
+            ORDER BY c.chunkSeqId
+        """, document_id=document_id)
+        
+        chunks = []
+        full_text = []
+        for record in chunks_result:
+            chunk_text = record["text"] or ""
+            chunks.append({
+                "id": record["id"],
+                "seq_id": record["seq_id"] or len(chunks),
+                "text": chunk_text,
+                "preview": chunk_text[:200] + "..." if len(chunk_text) > 200 else chunk_text
+            })
+            full_text.append(chunk_text)
+        
+        return {
+            "document_id": document_id,
+            "filename": doc["filename"],
+            "summary": doc["summary"] or "",
+            "chunks": chunks,
+            "total_chunks": len(chunks),
+            "full_text": "\n\n".join(full_text)
+        }
+
+
+# Resposta fixa do /doc-types, montada uma única vez na importação
+DOC_TYPE_DESCRIPTIONS = {
+    "generic": "Extração genérica - máximo de entidades e relacionamentos",
+    "legal": "Documentos jurídicos - contratos, processos, leis",
+    "medical": "Documentos médicos - diagnósticos, tratamentos, procedimentos",
+    "technical": "Documentos técnicos - software, arquitetura, frameworks",
+    "financial": "Documentos financeiros - transações, investimentos, mercado",
+    "aesthetics": "Documentos de estética - procedimentos, produtos, tratamentos",
+    "health": "Documentos de saúde geral - wellness, nutrição, lifestyle",
+    "it": "Documentos de TI - infraestrutura, DevOps, segurança"
+}
+
+DOC_TYPES_MAX_AGE = 3600
+
+DOC_TYPES_RESPONSE = {
+    "available_types": list(PROMPTS_BY_TYPE.keys()),
+    "descriptions": DOC_TYPE_DESCRIPTIONS
+}
 
 
 @app.get("/doc-types")
-async def get_document_types(current_user: User = Depends(get_current_active_user)):
+async def get_document_types(
+    response: Response,
+    current_user: User = Depends(get_current_active_user)
+):
     """
     Retorna lista de tipos de documentos disponíveis para extração.
     Use o 'type' no endpoint /process para especificar qual usar.
     """
-    from extraction_prompts import PROMPTS_BY_TYPE
-    
-    doc_types = {
-        "available_types": list(PROMPTS_BY_TYPE.keys()),
-        "descriptions": {
-            "generic": "Extração genérica - máximo de entidades e relacionamentos",
-            "legal": "Documentos jurídicos - contratos, processos, leis",
-            "medical": "Documentos médicos - diagnósticos, tratamentos, procedimentos",
-            "technical": "Documentos técnicos - software, arquitetura, frameworks",
-            "financial": "Documentos financeiros - transações, investimentos, mercado",
-            "aesthetics": "Documentos de estética - procedimentos, produtos, tratamentos",
-            "health": "Documentos de saúde geral - wellness, nutrição, lifestyle",
-            "it": "Documentos de TI - infraestrutura, DevOps, segurança"
-        }
+    # Catálogo estático: clientes podem reutilizar a resposta sem nova chamada
+    response.headers["Cache-Control"] = f"private, max-age={DOC_TYPES_MAX_AGE}"
+    return DOC_TYPES_RESPONSE
+
+
+@app.get("/bootstrap")
+def bootstrap(
+    status: Optional[List[str]] = Query(None),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Carga inicial do frontend em uma única chamada: documentos acessíveis + tipos de documento.
+    Aceita o mesmo filtro de status do /documents.
+    """
+    documents = fetch_documents(current_user, status=status)
+    return {
+        "documents": documents["documents"],
+        "total": documents["total"],
+        "doc_types": DOC_TYPES_RESPONSE
     }
-    
-    return doc_types
 
 
 @app.get("/supported-formats")
@@ -1395,73 +1670,80 @@ async def get_supported_formats(current_user: User = Depends(get_current_active_
 
 
 @app.get("/debug/document/{document_id}")
-async def debug_document(document_id: str):
+def debug_document(document_id: str):
     """Debug: Verifica se documento existe no Neo4j"""
     driver = get_neo4j_driver()
-    try:
-        with driver.session(database=get_neo4j_database()) as session:
-            result = session.run("""
-                MATCH (d:Document {id: $document_id})
-                RETURN d
+    with driver.session(database=get_neo4j_database()) as session:
+        result = session.run("""
+            MATCH (d:Document {id: $document_id})
+            RETURN d
+        """, document_id=document_id)
+        
+        record = result.single()
+        if record:
+            doc = dict(record["d"])
+            
+            # Contar chunks
+            chunks_result = session.run("""
+                MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)
+                RETURN count(c) as chunk_count
+            """, document_id=document_id)
+            chunk_count = chunks_result.single()["chunk_count"]
+            
+            # Contar entidades conectadas via HAS_ENTITY
+            entities_via_has = session.run("""
+                MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)-[:HAS_ENTITY]->(e)
+                RETURN count(DISTINCT e) as entity_count, collect(DISTINCT labels(e))[0..5] as sample_labels
             """, document_id=document_id)
+            entities_record = entities_via_has.single()
+            entity_count = entities_record["entity_count"]
+            sample_labels = entities_record["sample_labels"]
             
-            record = result.single()
-            if record:
-                doc = dict(record["d"])
-                
-                # Contar chunks
-                chunks_result = session.run("""
-                    MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)
-                    RETURN count(c) as chunk_count
-                """, document_id=document_id)
-                chunk_count = chunks_result.single()["chunk_count"]
-                
-                # Contar entidades conectadas via HAS_ENTITY
-                entities_via_has = session.run("""
-                    MATCH (d:Document {id: $document_id})<-[:PART_OF]-(c:Chunk)-[:HAS_ENTITY]->(e)
-                    RETURN count(DISTINCT e) as entity_count, collect(DISTINCT labels(e))[0..5] as sample_labels
-                """, document_id=document_id)
-                entities_record = entities_via_has.single()
-                entity_count = entities_record["entity_count"]
-                sample_labels = entities_record["sample_labels"]
-                
-                # Contar todas as entidades __Entity__
-                all_entities = session.run("""
-                    MATCH (e:__Entity__)
-                    RETURN count(e) as total_entities
-                """)
-                total_entities = all_entities.single()["total_entities"]
-                
-                # Verificar se há relacionamentos HAS_ENTITY
-                has_entity_count = session.run("""
-                    MATCH ()-[r:HAS_ENTITY]->()
-                    RETURN count(r) as rel_count
-                """)
-                has_entity_rel_count = has_entity_count.single()["rel_count"]
-                
-                return {
-                    "found": True, 
-                    "document": doc,
-                    "debug": {
-                        "chunks_for_document": chunk_count,
-                        "entities_connected_to_chunks": entity_count,
-                        "sample_entity_labels": sample_labels,
-                        "total_entities_in_db": total_entities,
-                        "total_has_entity_relationships": has_entity_rel_count
-                    }
+            # Contar todas as entidades __Entity__
+            all_entities = session.run("""
+                MATCH (e:__Entity__)
+                RETURN count(e) as total_entities
+            """)
+            total_entities = all_entities.single()["total_entities"]
+            
+            # Verificar se há relacionamentos HAS_ENTITY
+            has_entity_count = session.run("""
+                MATCH ()-[r:HAS_ENTITY]->()
+                RETURN count(r) as rel_count
+            """)
+            has_entity_rel_count = has_entity_count.single()["rel_count"]
+            
+            return {
+                "found": True, 
+                "document": doc,
+                "debug": {
+                    "chunks_for_document": chunk_count,
+                    "entities_connected_to_chunks": entity_count,
+                    "sample_entity_labels": sample_labels,
+                    "total_entities_in_db": total_entities,
+                    "total_has_entity_relationships": has_entity_rel_count
                 }
-            else:
-                # Tentar buscar todos os documentos
-                all_docs = session.run("MATCH (d:Document) RETURN d.id as id, d.fileName as name LIMIT 10")
-                docs_list = [{"id": r["id"], "name": r["name"]} for r in all_docs]
-                return {"found": False, "all_documents": docs_list}
-    finally:
-        driver.close()
+            }
+        else:
+            # Tentar buscar todos os documentos
+            all_docs = session.run("MATCH (d:Document) RETURN d.id as id, d.fileName as name LIMIT 10")
+            docs_list = [{"id": r["id"], "name": r["name"]} for r in all_docs]
+            return {"found": False, "all_documents": docs_list}
+
+
+# Cache curto do /health: cliques no dashboard não disparam novos probes a cada chamada
+HEALTH_CACHE_TTL = float(os.getenv("HEALTH_CACHE_TTL", "5"))
+_health_cache = {"checked_at": 0.0, "result": None}
 
 
 @app.get("/health")
-async def health_check():
-    """Verifica saúde da API e conexões (endpoint público)"""
+def health_check(refresh: bool = False):
+    """Verifica saúde da API e conexões (endpoint público, cacheado por HEALTH_CACHE_TTL segundos)"""
+    now = time.monotonic()
+    if (not refresh and _health_cache["result"] is not None
+            and now - _health_cache["checked_at"] < HEALTH_CACHE_TTL):
+        return _health_cache["result"]
+    
     health = {"api": "ok", "neo4j": "unknown", "redis": "unknown"}
     
     # Testar Neo4j
@@ -1470,7 +1752,6 @@ async def health_check():
         with driver.session(database=get_neo4j_database()) as session:
             session.run("RETURN 1")
         health["neo4j"] = "ok"
-        driver.close()
     except Exception as e:
         health["neo4j"] = f"error: {str(e)}"
     
@@ -1498,6 +1779,8 @@ async def health_check():
     except Exception as e:
         health["redis"] = f"error: {str(e)}"
     
+    _health_cache["checked_at"] = now
+    _health_cache["result"] = health
     return health
 
 
@@ -9,24 +9,14 @@ import json
 import time
 from langchain_anthropic import ChatAnthropic
 from langchain_openai import ChatOpenAI
-from langchain_experimental.graph_transformers import LLMGraphTransformer
 import anthropic
 from openai import OpenAI as OpenAIClient
 
+from extraction_prompts import validate_graph
 
-class ClaudeBatchProcessor:
-    """Processa múltiplos chunks usando Anthropic Batch API (50% mais barato)"""
-    
-    def __init__(self, api_key: str = None):
-        self.client = anthropic.Anthropic(api_key=api_key or os.getenv("ANTHROPIC_API_KEY"))
-    
-    def create_batch_requests(self, chunks: list, system_prompt: str = None) -> list:
-        """Cria requisições para batch processing"""
-        requests = []
-        
-        # Prompt padrão genérico (máximo de entidades e relacionamentos)
-        if not system_prompt:
-            system_prompt = """Extract all entities and relationships from this text to build a knowledge graph.
+
+# Prompt padrão genérico dos batch processors (máximo de entidades e relacionamentos)
+DEFAULT_BATCH_PROMPT = """Extract all entities and relationships from this text to build a knowledge graph.
 
 Return ONLY this JSON format:
 {
@@ -44,6 +34,30 @@ Rules:
 - Extract ALL relationships between entities
 - If no entities, return {"nodes": [], "relationships": []}
 - Return ONLY JSON, no markdown or text"""
+
+# Polling dos batches: backoff exponencial (reinicia quando o progresso muda)
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "10"))
+BATCH_POLL_MAX_INTERVAL = float(os.getenv("BATCH_POLL_MAX_INTERVAL", "120"))
+BATCH_POLL_BACKOFF = 1.5
+
+
+def _next_poll_delay(delay: float) -> float:
+    """Próximo intervalo de polling (multiplica pelo fator, limitado ao máximo)"""
+    return min(delay * BATCH_POLL_BACKOFF, BATCH_POLL_MAX_INTERVAL)
+
+
+class ClaudeBatchProcessor:
+    """Processa múltiplos chunks usando Anthropic Batch API (50% mais barato)"""
+    
+    def __init__(self, api_key: str = None):
+        self.client = anthropic.Anthropic(api_key=api_key or os.getenv("ANTHROPIC_API_KEY"))
+    
+    def create_batch_requests(self, chunks: list, system_prompt: str = None) -> list:
+        """Cria requisições para batch processing"""
+        requests = []
+        
+        if not system_prompt:
+            system_prompt = DEFAULT_BATCH_PROMPT
         
         for i, chunk in enumerate(chunks):
             requests.append({
@@ -80,6 +94,7 @@ Rules:
         """Aguarda conclusão do batch (máx 1 hora)"""
         start_time = time.time()
         last_status = None
+        delay = BATCH_POLL_INTERVAL
         
         while time.time() - start_time < max_wait:
             batch = self.client.beta.messages.batches.retrieve(batch_id)
@@ -91,6 +106,7 @@ Rules:
             if current_status != last_status:
                 print(f"   Status: {current_status}")
                 last_status = current_status
+                delay = BATCH_POLL_INTERVAL  # houve progresso: volta ao intervalo base
             
             if batch.processing_status == "ended":
                 elapsed = time.time() - start_time
@@ -105,7 +121,8 @@ Rules:
                 
                 return batch
             
-            time.sleep(10)  # Verificar a cada 10 segundos
+            time.sleep(delay)
+            delay = _next_poll_delay(delay)
         
         # Timeout
         if callback:
@@ -151,7 +168,7 @@ Rules:
                     else:
                         # Limpar markdown antes de parse
                         clean_content = strip_markdown_json(content)
-                        graph_data = json.loads(clean_content)
+                        graph_data = validate_graph(json.loads(clean_content))
                     
                     results.append({
                         "chunk_id": result.custom_id,
@@ -164,7 +181,7 @@ Rules:
                         "status": "failed",
                         "error": result.result.error.message if hasattr(result.result, 'error') else "Unknown error"
                     })
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 print(f"   ⚠️ Chunk {result.custom_id}: JSON inválido - {str(e)[:100]}")
                 results.append({
                     "chunk_id": result.custom_id,
@@ -227,24 +244,7 @@ class OpenAIBatchProcessor:
         import tempfile
         
         if not system_prompt:
-            system_prompt = """Extract all entities and relationships from this text to build a knowledge graph.
-
-Return ONLY this JSON format:
-{
-  "nodes": [
-    {"id": "entity_id", "type": "EntityType", "properties": {"description": "what is this"}}
-  ],
-  "relationships": [
-    {"source": "id1", "target": "id2", "type": "RELATIONSHIP", "properties": {"description": "how they relate"}}
-  ]
-}
-
-Rules:
-- Extract EVERY entity: people, organizations, places, concepts, products, events
-- Use simple IDs like "person_name", "org_name", "concept_name"
-- Extract ALL relationships between entities
-- If no entities, return {"nodes": [], "relationships": []}
-- Return ONLY JSON, no markdown or text"""
+            system_prompt = DEFAULT_BATCH_PROMPT
         
         # Criar arquivo JSONL temporário
         with tempfile.NamedTemporaryFile(mode='w', suffix='.jsonl', delete=False) as f:
@@ -291,6 +291,7 @@ Rules:
         """Aguarda conclusão do batch (máx 24 horas)"""
         start_time = time.time()
         last_status = None
+        delay = BATCH_POLL_INTERVAL
         
         while time.time() - start_time < max_wait:
             batch = self.client.batches.retrieve(batch_id)
@@ -299,6 +300,7 @@ Rules:
             if current_status != last_status:
                 print(f"   Status: {current_status}")
                 last_status = current_status
+                delay = BATCH_POLL_INTERVAL  # houve progresso: volta ao intervalo base
             
             if batch.status == "completed":
                 elapsed = time.time() - start_time
@@ -311,7 +313,8 @@ Rules:
                 
                 return batch
             
-            time.sleep(10)
+            time.sleep(delay)
+            delay = _next_poll_delay(delay)
         
         if callback:
             callback(batch_id, "timeout")
@@ -351,7 +354,7 @@ Rules:
                     if not content or content.strip() == "":
                         graph_data = {"nodes": [], "relationships": []}
                     else:
-                        graph_data = json.loads(content)
+                        graph_data = validate_graph(json.loads(content))
                     
                     results.append({
                         "chunk_id": custom_id,
@@ -364,7 +367,7 @@ Rules:
                         "status": "failed",
                         "error": f"HTTP {response.get('status_code')}"
                     })
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 results.append({
                     "chunk_id": custom_id if 'custom_id' in locals() else "unknown",
                     "status": "parse_error",
@@ -425,24 +428,7 @@ class KimiBatchProcessor:
         requests = []
         
         if not system_prompt:
-            system_prompt = """Extract all entities and relationships from this text to build a knowledge graph.
-
-Return ONLY this JSON format:
-{
-  "nodes": [
-    {"id": "entity_id", "type": "EntityType", "properties": {"description": "what is this"}}
-  ],
-  "relationships": [
-    {"source": "id1", "target": "id2", "type": "RELATIONSHIP", "properties": {"description": "how they relate"}}
-  ]
-}
-
-Rules:
-- Extract EVERY entity: people, organizations, places, concepts, products, events
-- Use simple IDs like "person_name", "org_name", "concept_name"
-- Extract ALL relationships between entities
-- If no entities, return {"nodes": [], "relationships": []}
-- Return ONLY JSON, no markdown or text"""
+            system_prompt = DEFAULT_BATCH_PROMPT
         
         for i, chunk in enumerate(chunks):
             requests.append({
@@ -478,14 +464,14 @@ Rules:
             if not content or content.strip() == "":
                 graph_data = {"nodes": [], "relationships": []}
             else:
-                graph_data = json.loads(content)
+                graph_data = validate_graph(json.loads(content))
             
             return {
                 "chunk_id": request["custom_id"],
                 "status": "success",
                 "data": graph_data
             }
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             return {
                 "chunk_id": request["custom_id"],
                 "status": "parse_error",
@@ -531,7 +517,8 @@ Rules:
 class LLMProvider:
     """Factory para criar LLMs baseado no modelo escolhido"""
     
-    SUPPORTED_MODELS = ["claude", "openai", "kimi", "deepseek", "ollama"]
+    SUPPORTED_MODELS = ("claude", "openai", "kimi", "deepseek", "ollama")
+    SUPPORTED_MODELS_SET = frozenset(SUPPORTED_MODELS)  # usar nas validações (lookup O(1))
     
     @staticmethod
     def get_llm(model: str):
@@ -597,29 +584,11 @@ class LLMProvider:
         """
         Retorna LLMGraphTransformer configurado com o modelo escolhido.
         """
-        from langchain_core.prompts import PromptTemplate
+        # Import tardio: langchain_experimental é pesado e só é usado aqui
+        from langchain_experimental.graph_transformers import LLMGraphTransformer
         
         llm = LLMProvider.get_llm(model)
         
-        # Prompt customizado para garantir formato correto
-        system_prompt = """You are an expert at extracting information and building knowledge graphs.
-Extract all entities and relationships from the text. Return a valid JSON with this exact structure:
-{
-  "nodes": [
-    {"id": "entity_id", "type": "EntityType", "properties": {"description": "brief description"}}
-  ],
-  "relationships": [
-    {"source": "entity_id_1", "target": "entity_id_2", "type": "RELATIONSHIP_TYPE", "properties": {"description": "brief description"}}
-  ]
-}
-
-IMPORTANT:
-- Every node MUST have an "id", "type", and "properties" field
-- The "type" field is REQUIRED and should be a single word (e.g., Person, Organization, Location, Concept)
-- Every relationship MUST have "source", "target", "type", and "properties" fields
-- Return ONLY valid JSON, no markdown, no extra text
-- If no entities found, return {"nodes": [], "relationships": []}"""
-        
         return LLMGraphTransformer(
             llm=llm,
             node_properties=["description"],
@@ -629,7 +598,7 @@ IMPORTANT:
     @staticmethod
     def validate_model(model: str) -> bool:
         """Valida se o modelo é suportado"""
-        return model.lower() in LLMProvider.SUPPORTED_MODELS
+        return model.lower() in LLMProvider.SUPPORTED_MODELS_SET
     
     @staticmethod
     def get_batch_processor(model: str = "claude"):
@@ -650,6 +619,11 @@ IMPORTANT:
         - all-MiniLM-L6-v2: rápido, 384 dimensões
         - all-mpnet-base-v2: melhor qualidade, 768 dimensões
         - BAAI/bge-small-en-v1.5: ótimo equilíbrio, 384 dimensões
+
+        LOCAL_EMBEDDING_BACKEND escolhe o runtime do modelo local:
+        - torch (padrão)
+        - onnx: exporta/usa o modelo via ONNX Runtime (requer optimum[onnxruntime])
+        - openvino: compila para CPU/iGPU Intel (requer optimum[openvino])
         """
         # Verificar se deve forçar OpenAI
         force_openai = os.getenv("FORCE_OPENAI_EMBEDDINGS", "").lower() == "true"
@@ -675,7 +649,11 @@ IMPORTANT:
             # Diretório de cache para modelos
             cache_dir = os.getenv("HF_HOME", os.path.expanduser("~/.cache/huggingface"))
             
-            print(f"   📊 Usando embeddings locais: {embed_model_name}")
+            # Runtime do modelo (torch, onnx ou openvino)
+            backend = os.getenv("LOCAL_EMBEDDING_BACKEND", "torch").lower()
+            backend_kwargs = {"backend": backend} if backend != "torch" else {}
+            
+            print(f"   📊 Usando embeddings locais: {embed_model_name} (backend: {backend})")
             
             # Tentar carregar em modo offline primeiro (usa cache)
             try:
@@ -685,7 +663,8 @@ IMPORTANT:
                 return HuggingFaceEmbedding(
                     model_name=embed_model_name,
                     cache_folder=cache_dir,
-                    trust_remote_code=True
+                    trust_remote_code=True,
+                    **backend_kwargs
                 )
             except Exception as offline_err:
                 print(f"   ⚠️ Modo offline falhou: {offline_err}")
@@ -699,7 +678,8 @@ IMPORTANT:
                     return HuggingFaceEmbedding(
                         model_name=embed_model_name,
                         cache_folder=cache_dir,
-                        trust_remote_code=True
+                        trust_remote_code=True,
+                        **backend_kwargs
                     )
                 except Exception as network_err:
                     print(f"   ❌ Falha ao baixar modelo: {network_err}")
@@ -714,7 +694,7 @@ IMPORTANT:
                             cache_folder=cache_dir,
                             trust_remote_code=True
                         )
-                    except:
+                    except Exception:
                         raise network_err  # Re-raise se fallback também falhar
                         
         except ImportError:
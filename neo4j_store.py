@@ -6,12 +6,25 @@ from llama_index.core.vector_stores.types import (
 )
 from llama_index.core.schema import TextNode, BaseNode
 from neo4j import GraphDatabase
+import numpy as np
 import logging
 import json
+import os
 import hashlib
 
 logger = logging.getLogger(__name__)
 
+# Funções de similaridade aceitas pelo índice vetorial do Neo4j (valor vai para o DDL)
+VECTOR_SIMILARITY_FUNCTIONS = frozenset({"cosine", "euclidean"})
+
+
+def normalize_embeddings(embeddings: List[List[float]]) -> List[List[float]]:
+    """Normaliza embeddings para norma L2 unitária (linha a linha)"""
+    arr = np.asarray(embeddings, dtype=np.float32)
+    arr /= np.linalg.norm(arr, axis=-1, keepdims=True) + 1e-12
+    return arr.tolist()
+
+
 class CustomNeo4jVectorStore(VectorStore):
     stores_text: bool = True
     
@@ -24,18 +37,34 @@ class CustomNeo4jVectorStore(VectorStore):
         index_name: str = "vector",  # Mesmo nome do llm-graph-builder
         node_label: str = "Chunk",   # Usar Chunk, não DocumentChunk
         database: str = "neo4j",
+        similarity_function: Optional[str] = None,
+        driver: Optional[Any] = None,
+        create_index: bool = True,
     ):
-        self.driver = GraphDatabase.driver(url, auth=(username, password))
+        # Reutiliza um driver existente (pool compartilhado) quando fornecido
+        self.driver = driver or GraphDatabase.driver(url, auth=(username, password))
         self.embedding_dimension = embedding_dimension
+        # Embeddings são salvos normalizados: com 'euclidean' o ranking é o mesmo
+        # do cosseno, sem recalcular normas a cada comparação no índice.
+        # Só vale na criação do índice (use RECREATE_VECTOR_INDEX=true para trocar)
+        self.similarity_function = (similarity_function or os.getenv("VECTOR_SIMILARITY_FUNCTION", "cosine")).lower()
+        if self.similarity_function not in VECTOR_SIMILARITY_FUNCTIONS:
+            raise ValueError(
+                f"VECTOR_SIMILARITY_FUNCTION inválida: {self.similarity_function!r} "
+                f"(use {' ou '.join(sorted(VECTOR_SIMILARITY_FUNCTIONS))})"
+            )
         self.index_name = index_name
         self.node_label = node_label
         self.database = database
         
-        # Criar índice vetorial se não existir
-        self._create_index()
+        # Criar índice vetorial se não existir (a API só consulta: passa create_index=False)
+        if create_index:
+            self._create_index()
+        
+        # O índice é IF NOT EXISTS: a escala dos scores segue a função do índice real
+        self.similarity_function = self._index_similarity_function() or self.similarity_function
 
     def _create_index(self):
-        import os
         recreate = os.getenv("RECREATE_VECTOR_INDEX", "").lower() == "true"
         
         # Se flag RECREATE_VECTOR_INDEX=true, dropar índice existente para recriar com nova dimensão
@@ -54,7 +83,7 @@ class CustomNeo4jVectorStore(VectorStore):
         ON (n.embedding)
         OPTIONS {{indexConfig: {{
             `vector.dimensions`: {self.embedding_dimension},
-            `vector.similarity_function`: 'cosine'
+            `vector.similarity_function`: '{self.similarity_function}'
         }}}}
         """
         with self.driver.session(database=self.database) as session:
@@ -62,6 +91,31 @@ class CustomNeo4jVectorStore(VectorStore):
             if recreate:
                 print(f"   ✅ Índice vetorial recriado com {self.embedding_dimension} dimensões")
 
+    def _index_similarity_function(self) -> Optional[str]:
+        """Lê a função de similaridade do índice existente (SHOW INDEXES)"""
+        try:
+            with self.driver.session(database=self.database) as session:
+                record = session.run("""
+                    SHOW INDEXES YIELD name, options
+                    WHERE name = $name
+                    RETURN options
+                """, name=self.index_name).single()
+        except Exception as e:
+            logger.warning(f"Não foi possível ler a configuração do índice '{self.index_name}': {e}")
+            return None
+        
+        if not record or not record["options"]:
+            return None
+        function = ((record["options"].get("indexConfig") or {}).get("vector.similarity_function") or "").lower()
+        if function not in VECTOR_SIMILARITY_FUNCTIONS:
+            return None
+        if function != self.similarity_function:
+            logger.warning(
+                f"Índice '{self.index_name}' usa '{function}', não '{self.similarity_function}' "
+                f"(use RECREATE_VECTOR_INDEX=true para trocar)"
+            )
+        return function
+
     def add(
         self,
         nodes: List[BaseNode],
@@ -71,9 +125,14 @@ class CustomNeo4jVectorStore(VectorStore):
         print(f"\n💾 VectorStore.add(): Salvando {len(nodes)} embeddings nos Chunk nodes...")
         ids = []
         updated_count = 0
+        
+        # Normalizar todos os embeddings de uma vez
+        embedded = [i for i, node in enumerate(nodes) if node.embedding]
+        normalized = dict(zip(embedded, normalize_embeddings([nodes[i].embedding for i in embedded]))) if embedded else {}
+        
         with self.driver.session(database=self.database) as session:
             for i, node in enumerate(nodes):
-                embedding = node.get_embedding()
+                embedding = normalized.get(i)
                 if not embedding:
                     print(f"   ⚠️ Node {i+1}: sem embedding, pulando")
                     continue
@@ -133,7 +192,7 @@ class CustomNeo4jVectorStore(VectorStore):
                 cypher_query,
                 index_name=self.index_name,
                 k=query.similarity_top_k,
-                embedding=query.query_embedding
+                embedding=normalize_embeddings([query.query_embedding])[0]
             )
             
             for record in result:
@@ -150,7 +209,7 @@ class CustomNeo4jVectorStore(VectorStore):
                     metadata=metadata
                 )
                 nodes.append(node)
-                similarities.append(record["score"])
+                similarities.append(self._to_cosine_score(record["score"]))
                 ids.append(record["id"])
 
         return VectorStoreQueryResult(
@@ -159,6 +218,14 @@ class CustomNeo4jVectorStore(VectorStore):
             ids=ids
         )
 
+    def _to_cosine_score(self, score: float) -> float:
+        """Converte o score do índice para a escala do índice cosine: (1 + cos) / 2"""
+        if self.similarity_function != "euclidean":
+            return score
+        # Neo4j euclidean: score = 1 / (1 + d²); para vetores unitários d² = 2 - 2·cos
+        squared_distance = 1.0 / score - 1.0
+        return 1.0 - squared_distance / 4.0
+
     @property
     def client(self) -> Any:
         return self.driver